@@ -0,0 +1,141 @@
+"""
+Benchmark: hot-path lookups with and without the query-pattern indexes.
+
+Seeds a throwaway test database (never db.sqlite3) with invitations, tickets
+and guests, then prints the query plan and best-of-N timing of each lookup
+with the indexes from invitations 0014 dropped ("before") and in place
+("after").
+Usage: python bench_indexes.py [--invitations N] [--guests N] [--tickets N] [--repeat N]
+"""
+import os
+import sys
+import time
+import uuid
+from datetime import timedelta
+import django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import setup_test_environment
+from django.utils import timezone
+from guests.models import Guest
+from invitations.models import InvitationData, InvitationTicket
+
+
+def arg(name, default):
+    return int(sys.argv[sys.argv.index(name) + 1]) if name in sys.argv else default
+
+
+INVITATIONS = arg('--invitations', 2000)
+GUESTS = arg('--guests', 100000)
+TICKETS = arg('--tickets', 50000)
+REPEAT = arg('--repeat', 20)
+
+BENCH_INDEXES = [
+    (InvitationTicket, 'ticket_unclaimed_token_idx'),
+    (InvitationTicket, 'ticket_unclaimed_email_idx'),
+]
+
+
+def seed():
+    now = timezone.now()
+    users = User.objects.bulk_create([
+        User(username=f'bench{i}', email=f'bench{i}@example.com') for i in range(max(INVITATIONS // 10, 1))
+    ])
+    invitations = InvitationData.objects.bulk_create([
+        InvitationData(
+            user=users[i % len(users)], slug=f'bench-{i}', expires_at=now + timedelta(days=i % 7 - 2),
+            groom_name='Budi', bridal_name='Ani', dad_groom_name='Dad', mom_groom_name='Mom',
+            dad_bridal_name='Dad', mom_bridal_name='Mom'
+        ) for i in range(INVITATIONS)
+    ], batch_size=1000)
+    InvitationTicket.objects.bulk_create([
+        InvitationTicket(
+            invitation=invitations[i % len(invitations)], email=f'bench{i % len(users)}@example.com',
+            token_hash=uuid.uuid4().hex * 2, role='viewer',
+            # Most tickets are claimed or expired, like a real table after a while
+            expires_at=now + timedelta(days=1 if i % 10 == 0 else -1), is_claimed=i % 3 == 0
+        ) for i in range(TICKETS)
+    ], batch_size=1000)
+    Guest.objects.bulk_create([
+        Guest(
+            invitation=invitations[i % len(invitations)], name=f'Guest {i}', slug=f'guest-{i}',
+            type='individual', wa=f'62812{i:08d}'
+        ) for i in range(GUESTS)
+    ], batch_size=1000)
+    return users[0], invitations[0], InvitationTicket.objects.filter(is_claimed=False).first()
+
+
+def lookups(user, invitation, ticket):
+    now = timezone.now()
+    return [
+        ('join: ticket by token', InvitationTicket.objects.filter(
+            token_hash=ticket.token_hash, is_claimed=False, expires_at__gt=now)),
+        ('my-pending: tickets by email', InvitationTicket.objects.filter(
+            email=user.email, is_claimed=False, expires_at__gt=now)),
+        ('owner tickets of invitations', InvitationTicket.objects.filter(
+            invitation_id__in=[invitation.pk], is_claimed=False, expires_at__gt=now)),
+        ('guest page (keyset order)', Guest.objects.filter(
+            invitation=invitation).order_by('-name', '-id')[:51]),
+        ('public guest by slug', Guest.objects.filter(
+            invitation=invitation, slug='guest-0')),
+    ]
+
+
+def measure(queryset):
+    list(queryset.all()) # Warm up the page cache
+    timings = []
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        list(queryset.all())
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1000
+
+
+def run(label, user, invitation, ticket):
+    results = {}
+    print(f'\n== {label} ==')
+    for name, queryset in lookups(user, invitation, ticket):
+        ms = measure(queryset)
+        results[name] = ms
+        print(f'{name:<32} {ms:>8.3f} ms')
+        for line in queryset.explain().splitlines():
+            print(f'    {line}')
+    return results
+
+
+def main():
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        started = time.perf_counter()
+        user, invitation, ticket = seed()
+        print(f'Seeded {INVITATIONS} invitations, {TICKETS} tickets, {GUESTS} guests '
+              f'in {time.perf_counter() - started:.1f}s ({connection.vendor})')
+
+        indexes = [
+            (model, next(index for index in model._meta.indexes if index.name == name))
+            for model, name in BENCH_INDEXES
+        ]
+        with connection.schema_editor() as editor:
+            for model, index in indexes:
+                editor.remove_index(model, index)
+        before = run('before (indexes dropped)', user, invitation, ticket)
+        with connection.schema_editor() as editor:
+            for model, index in indexes:
+                editor.add_index(model, index)
+        after = run('after (indexes in place)', user, invitation, ticket)
+
+        print(f'\n{"lookup":<32} | {"before ms":>9} | {"after ms":>9} | {"speedup":>7}')
+        print('-' * 66)
+        for name, after_ms in after.items():
+            speedup = before[name] / after_ms if after_ms else float('inf')
+            print(f'{name:<32} | {before[name]:>9.3f} | {after_ms:>9.3f} | {speedup:>6.1f}x')
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
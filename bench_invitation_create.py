@@ -0,0 +1,97 @@
+"""
+Benchmark: invitation creation time as the number of nested events/gifts grows.
+
+Runs against a throwaway test database, so it never touches db.sqlite3.
+Every invitation gets its own couple names, so slug generation never has to
+retry, and the query counts leave out transaction control (BEGIN, COMMIT,
+savepoints).
+Usage: python bench_invitation_create.py [--repeat N]
+"""
+import os
+import sys
+import time
+from itertools import count
+import django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, setup_test_environment
+from invitations.models import InvitationData, InvitationMember, Event, BankAccount
+from invitations.serializers import InvitationDataSerializer
+
+SIZES = [0, 1, 10, 50, 100, 500]
+REPEAT = int(sys.argv[sys.argv.index('--repeat') + 1]) if '--repeat' in sys.argv else 5
+TRANSACTION_CONTROL = ('BEGIN', 'COMMIT', 'ROLLBACK', 'SAVEPOINT', 'RELEASE')
+
+_couples = count()
+
+
+def payload(n):
+    couple = next(_couples)
+    return {
+        'groomName': f'Budi {couple}', 'bridalName': 'Ani',
+        'dadGroomName': 'Dad', 'momGroomName': 'Mom', 'dadBridalName': 'Dad', 'momBridalName': 'Mom',
+        'eventList': [{
+            'eventName': f'Event {i}', 'address': 'Jakarta', 'gmapsLink': 'https://maps.google.com',
+            'date': '2026-01-01', 'time': '08:00', 'timeEnd': '10:00'
+        } for i in range(n)],
+        'digitalGifts': [{
+            'bankName': 'BCA', 'accountNumber': str(i), 'accountHolder': 'Budi'
+        } for i in range(n)],
+    }
+
+
+def create_bulk(user, data):
+    serializer = InvitationDataSerializer(data=data)
+    serializer.is_valid(raise_exception=True)
+    serializer.save(user=user)
+
+
+def create_per_row(user, data):
+    # Reference: the previous one-INSERT-per-child path, outside a transaction
+    serializer = InvitationDataSerializer(data=data)
+    serializer.is_valid(raise_exception=True)
+    validated = dict(serializer.validated_data)
+    events = validated.pop('events', [])
+    gifts = validated.pop('digital_gifts', [])
+    invitation = InvitationData.objects.create(user=user, slug='', **validated)
+    invitation.slug = str(invitation.id)
+    invitation.save()
+    for event in events:
+        Event.objects.create(invitation=invitation, **event)
+    for gift in gifts:
+        BankAccount.objects.create(invitation=invitation, **gift)
+    InvitationMember.objects.create(invitation=invitation, user=user, role='owner')
+
+
+def measure(fn, user, n):
+    timings = []
+    for _ in range(REPEAT):
+        data = payload(n)
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            fn(user, data)
+            timings.append(time.perf_counter() - started)
+    statements = [query for query in queries.captured_queries if not query['sql'].startswith(TRANSACTION_CONTROL)]
+    return min(timings) * 1000, len(statements)
+
+
+def main():
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        user = User.objects.create(username='bench', email='bench@example.com')
+        print(f'{"children":>9} | {"bulk ms":>9} | {"queries":>7} | {"per-row ms":>10} | {"queries":>7}')
+        print('-' * 55)
+        for n in SIZES:
+            bulk_ms, bulk_queries = measure(create_bulk, user, n)
+            row_ms, row_queries = measure(create_per_row, user, n)
+            print(f'{n * 2:>9} | {bulk_ms:>9.2f} | {bulk_queries:>7} | {row_ms:>10.2f} | {row_queries:>7}')
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""
+Benchmark: guest search latency (GuestViewSet ?search=) with and without the
+search indexes.
+
+Seeds a throwaway test database (never db.sqlite3) with invitations of
+--per-invitation guests each, then prints the query plan and p50/p95 of one
+search page (51 rows, the keyset page size + 1) per kind of term, with the
+indexes dropped ("before") and in place ("after").
+Usage: python bench_search.py [--guests N] [--per-invitation N] [--repeat N]
+"""
+import os
+import random
+import statistics
+import sys
+import time
+import django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import setup_test_environment
+from guests.models import Guest
+from guests.search import search_guests
+from invitations.models import InvitationData
+
+
+def arg(name, default):
+    return int(sys.argv[sys.argv.index(name) + 1]) if name in sys.argv else default
+
+
+GUESTS = arg('--guests', 100000)
+PER_INVITATION = arg('--per-invitation', 2000)
+REPEAT = arg('--repeat', 200)
+
+BENCH_INDEXES = ['guest_search_name_idx', 'unique_guest_wa_per_invitation']
+FIRST_NAMES = ['Budi', 'Siti', 'Agus', 'Dewi', 'Rizky', 'Putri', 'Ahmad', 'Nur', 'Désy', 'Eko', 'Fitri', 'Andi']
+LAST_NAMES = ['Santoso', 'Wijaya', 'Saputra', 'Lestari', 'Hidayat', 'Pratama', 'Kusuma', 'Rahmawati']
+
+
+def seed():
+    rng = random.Random(42)
+    user = User.objects.create(username='bench', email='bench@example.com')
+    invitations = InvitationData.objects.bulk_create([
+        InvitationData(
+            user=user, slug=f'bench-{i}', groom_name='Budi', bridal_name='Ani', dad_groom_name='Dad',
+            mom_groom_name='Mom', dad_bridal_name='Dad', mom_bridal_name='Mom'
+        ) for i in range(max(GUESTS // PER_INVITATION, 1))
+    ])
+    guests = []
+    for i in range(GUESTS):
+        guest = Guest(
+            invitation=invitations[i % len(invitations)], slug=f'guest-{i}', type='individual',
+            name=f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {i}',
+            wa=f'08{rng.randrange(100, 1000)}{i:07d}', email=f'guest{i}@example.com'
+        )
+        guest.normalize_fields()
+        guests.append(guest)
+    Guest.objects.bulk_create(guests, batch_size=1000)
+    return invitations[0]
+
+
+def searches(invitation):
+    guests = Guest.objects.filter(invitation=invitation).order_by('-name', '-id')
+    return [
+        ('name prefix "bud"', search_guests(guests, 'bud')[:51]),
+        ('name prefix "desy wij"', search_guests(guests, 'Désy Wij')[:51]),
+        ('phone "0812"', search_guests(guests, '0812')[:51]),
+        ('phone "+62 8123 4"', search_guests(guests, '+62 8123 4')[:51]),
+        ('email "guest12@"', search_guests(guests, 'guest12@')[:51]),
+    ]
+
+
+def measure(queryset):
+    list(queryset.all()) # Warm up the page cache
+    timings = []
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        list(queryset.all())
+        timings.append((time.perf_counter() - started) * 1000)
+    quantiles = statistics.quantiles(timings, n=20)
+    return statistics.median(timings), quantiles[-1]
+
+
+def run(label, invitation):
+    results = {}
+    print(f'\n== {label} ==')
+    for name, queryset in searches(invitation):
+        p50, p95 = measure(queryset)
+        results[name] = p95
+        print(f'{name:<24} p50 {p50:>8.3f} ms  p95 {p95:>8.3f} ms')
+        for line in queryset.explain().splitlines():
+            print(f'    {line}')
+    return results
+
+
+def main():
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        started = time.perf_counter()
+        invitation = seed()
+        print(f'Seeded {GUESTS} guests, {PER_INVITATION} per invitation '
+              f'in {time.perf_counter() - started:.1f}s ({connection.vendor})')
+
+        indexes = [index for index in Guest._meta.indexes if index.name in BENCH_INDEXES]
+        # The number index is the partial unique constraint on (invitation, wa)
+        constraints = [constraint for constraint in Guest._meta.constraints if constraint.name in BENCH_INDEXES]
+        with connection.schema_editor() as editor:
+            for index in indexes:
+                editor.remove_index(Guest, index)
+            for constraint in constraints:
+                editor.remove_constraint(Guest, constraint)
+        before = run('before (search indexes dropped)', invitation)
+        with connection.schema_editor() as editor:
+            for index in indexes:
+                editor.add_index(Guest, index)
+            for constraint in constraints:
+                editor.add_constraint(Guest, constraint)
+        after = run('after (search indexes in place)', invitation)
+
+        print(f'\n{"search":<24} | {"before p95":>10} | {"after p95":>10} | {"speedup":>7}')
+        print('-' * 62)
+        for name, after_ms in after.items():
+            speedup = before[name] / after_ms if after_ms else float('inf')
+            print(f'{name:<24} | {before[name]:>10.3f} | {after_ms:>10.3f} | {speedup:>6.1f}x')
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
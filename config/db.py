@@ -0,0 +1,77 @@
+"""
+Environment-driven DATABASES for config/settings.py.
+
+DB_ENGINE=sqlite (default, development) or postgres. For PostgreSQL:
+DB_NAME, DB_USER, DB_PASSWORD, DB_HOST, DB_PORT; connections are kept open
+for DB_CONN_MAX_AGE seconds and health-checked before reuse, or pooled with
+DB_POOL=True (psycopg 3 with the pool extra). DB_REPLICA_HOSTS is a comma
+separated list of read replicas (same credentials), exposed as replica_1,
+replica_2, ... and used by core.db.PrimaryReplicaRouter.
+"""
+import os
+
+
+def _env_bool(name, default=False):
+    return os.getenv(name, str(default)) == 'True'
+
+
+def sqlite_database(base_dir):
+    return {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.getenv('DB_NAME', base_dir / 'db.sqlite3'),
+        'OPTIONS': {
+            # Wait for the write lock instead of failing with "database is locked",
+            # and take it up front so read->write upgrades can't deadlock
+            'timeout': int(os.getenv('DB_SQLITE_TIMEOUT', 20)),
+            'transaction_mode': 'IMMEDIATE',
+        },
+        # WAL and the other pragmas are set per connection by core.db.configure_sqlite
+    }
+
+
+def postgres_database():
+    database = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.getenv('DB_NAME', 'saturasa'),
+        'USER': os.getenv('DB_USER', 'postgres'),
+        'PASSWORD': os.getenv('DB_PASSWORD', ''),
+        'HOST': os.getenv('DB_HOST', 'localhost'),
+        'PORT': os.getenv('DB_PORT', '5432'),
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': _env_bool('DB_CONN_HEALTH_CHECKS', True),
+        'OPTIONS': {
+            'connect_timeout': int(os.getenv('DB_CONNECT_TIMEOUT', 5)),
+        },
+    }
+    if _env_bool('DB_POOL'):
+        # Server-side pool per process; persistent connections must be off with it
+        database['CONN_MAX_AGE'] = 0
+        database['OPTIONS']['pool'] = {
+            'min_size': int(os.getenv('DB_POOL_MIN_SIZE', 2)),
+            'max_size': int(os.getenv('DB_POOL_MAX_SIZE', 10)),
+            'timeout': int(os.getenv('DB_POOL_TIMEOUT', 10)),
+        }
+    return database
+
+
+def database_settings(base_dir):
+    engine = os.getenv('DB_ENGINE', 'sqlite')
+    if engine == 'sqlite':
+        return {'default': sqlite_database(base_dir)}
+    if engine not in ('postgres', 'postgresql'):
+        raise ValueError(f"Unsupported DB_ENGINE '{engine}', expected sqlite or postgres")
+
+    default = postgres_database()
+    databases = {'default': default}
+    replica_hosts = [host.strip() for host in os.getenv('DB_REPLICA_HOSTS', '').split(',') if host.strip()]
+    for number, host in enumerate(replica_hosts, start=1):
+        host, _, port = host.partition(':')
+        databases[f'replica_{number}'] = {
+            **default,
+            'OPTIONS': {**default['OPTIONS']},
+            'HOST': host,
+            'PORT': port or default['PORT'],
+            # Tests run against the primary only
+            'TEST': {'MIRROR': 'default'},
+        }
+    return databases
@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/6.0/ref/settings/
 
 from pathlib import Path
 import os
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -55,6 +56,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
+    'core.db.DatabaseRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -87,13 +89,71 @@ WSGI_APPLICATION = 'config.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
-DATABASES = {
+# SQLite by default (development); set DB_ENGINE=postgres and friends in
+# production, see config/db.py for the variables
+from .db import database_settings
+
+DATABASES = database_settings(BASE_DIR)
+if DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql':
+    # Trigram lookups for guest search (pg_trgm)
+    INSTALLED_APPS.append('django.contrib.postgres')
+
+# Opt-in replica reads, pinned to the primary after a write (core/db.py)
+DATABASE_ROUTERS = ['core.db.PrimaryReplicaRouter']
+
+
+# Cache
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+# Local memory by default; point CACHE_BACKEND/CACHE_LOCATION at a shared
+# backend (e.g. django.core.cache.backends.redis.RedisCache) in production.
+# Catalog loads and usage flushes run in their own process and only reach
+# the server through a shared cache (see core/caches.py).
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'saturasa'),
+    },
+    # Guest import progress: files, so every worker on this host sees it
+    # without extra services. Multi-host setups point GUEST_IMPORT_CACHE at a
+    # shared 'default' instead.
+    'guest_imports': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv('GUEST_IMPORT_CACHE_LOCATION', os.path.join(tempfile.gettempdir(), 'saturasa-guest-import-progress')),
+    },
 }
 
+# Public invitation render cache (see invitations/render.py)
+INVITATION_RENDER_CACHE = os.getenv('INVITATION_RENDER_CACHE', 'default')
+INVITATION_RENDER_CACHE_TIMEOUT = int(os.getenv('INVITATION_RENDER_CACHE_TIMEOUT', 60 * 60))
+INVITATION_RENDER_MAX_AGE = int(os.getenv('INVITATION_RENDER_MAX_AGE', 60)) # Browser/CDN Cache-Control
+
+# Template/Song catalog cache (see core/catalog.py), versioned so timeouts can be long
+CATALOG_CACHE = os.getenv('CATALOG_CACHE', 'default')
+CATALOG_CACHE_TIMEOUT = int(os.getenv('CATALOG_CACHE_TIMEOUT', 60 * 60 * 24))
+CATALOG_MAX_AGE = int(os.getenv('CATALOG_MAX_AGE', 60 * 10)) # Browser/CDN Cache-Control
+
+# Guest interaction buffer (guests/interactions.py)
+GUEST_INTERACTION_FLUSH_INTERVAL = float(os.getenv('GUEST_INTERACTION_FLUSH_INTERVAL', 2)) # Seconds
+GUEST_INTERACTION_MAX_PENDING = int(os.getenv('GUEST_INTERACTION_MAX_PENDING', 5000)) # Flush early past this many guests
+GUEST_RSVP_MAX_PAX = int(os.getenv('GUEST_RSVP_MAX_PAX', 20))
+
+# Guest list uploads (guests/uploads.py)
+GUEST_IMPORT_CACHE = os.getenv('GUEST_IMPORT_CACHE', 'guest_imports') # Must be shared: progress is polled from any worker
+GUEST_IMPORT_STALE_AFTER = int(os.getenv('GUEST_IMPORT_STALE_AFTER', 5 * 60)) # Seconds without a heartbeat before a job counts as dead
+
+# Greetings wall (guests/greetings.py)
+GREETING_WALL_CACHE = os.getenv('GREETING_WALL_CACHE', 'default')
+GREETING_MAX_LENGTH = int(os.getenv('GREETING_MAX_LENGTH', 1000))
+GREETING_WALL_CACHE_TIMEOUT = int(os.getenv('GREETING_WALL_CACHE_TIMEOUT', 60 * 60))
+
+# Guest WhatsApp numbers and send links (guests/whatsapp.py)
+WA_COUNTRY_CODE = os.getenv('WA_COUNTRY_CODE', '62') # Added to national WhatsApp numbers (0812.. -> 62812..)
+INVITATION_LINK_FORMAT = os.getenv('INVITATION_LINK_FORMAT', 'http://localhost:3000/{slug}/{guest_slug}') # Guest's personal invitation page
+
+# Rows per template/song that used_count increments are spread over (core/usage.py)
+USAGE_COUNTER_SHARDS = int(os.getenv('USAGE_COUNTER_SHARDS', 8))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -151,4 +211,8 @@ CORS_ALLOWED_ORIGINS = [
 
 GOOGLE_CLIENT_ID = os.getenv('GOOGLE_CLIENT_ID')
 GOOGLE_CLIENT_SECRET = os.getenv('GOOGLE_CLIENT_SECRET')
+# Signing certs for Google ID tokens, cached per process (see users/google_certs.py).
+# Point at `manage.py fake_google_certs` for local testing.
+GOOGLE_CERTS_URL = os.getenv('GOOGLE_CERTS_URL', 'https://www.googleapis.com/oauth2/v1/certs')
+GOOGLE_CERTS_TIMEOUT = int(os.getenv('GOOGLE_CERTS_TIMEOUT', 5))
 
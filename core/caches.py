@@ -0,0 +1,30 @@
+"""
+Cache topology checks.
+
+Several features write to a cache from one process and read from another:
+management commands bump catalog versions and drop rendered invitations, and
+guest uploads report progress to whichever web worker serves the poll. With
+a process-local backend (the LocMemCache default) those writes never reach
+the server.
+"""
+from django.conf import settings
+
+PROCESS_LOCAL_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+)
+
+
+def is_process_local(alias='default'):
+    return settings.CACHES[alias]['BACKEND'] in PROCESS_LOCAL_BACKENDS
+
+
+def process_local_warning(*aliases):
+    """Warning for commands whose cache writes other processes won't see, or None."""
+    local = sorted({alias for alias in aliases if is_process_local(alias)})
+    if not local:
+        return None
+    return (
+        f"Cache {', '.join(local)} is process-local ({PROCESS_LOCAL_BACKENDS[0]}): "
+        'the running server will not see this change until its cached copies expire. '
+        'Configure a shared cache (CACHE_BACKEND/CACHE_LOCATION) or restart the server.'
+    )
@@ -0,0 +1,103 @@
+"""
+Cached Template/Song catalog for the public listing endpoints.
+
+Each catalog is serialized once and stored, per category, as pre-encoded JSON
+bytes with their ETag under a versioned key. Writes never touch the entries:
+they bump the catalog version (signals in core/signals.py, and the management
+commands after bulk writes), which makes every old entry unreachable, so the
+cache timeout can be long.
+"""
+import hashlib
+import uuid
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.renderers import JSONRenderer
+
+ALL = None # Entry key for the unfiltered list (categories are never NULL)
+
+# ?ordering= values served from the cache: name -> (sort key, reverse)
+ORDERINGS = {
+    'popular': (lambda item: item['usedCount'], True),
+}
+
+
+def _catalogs():
+    from .models import Template, Song
+    from .serializers import TemplateSerializer, SongSerializer
+    return {
+        'templates': (Template.objects.order_by('pk'), TemplateSerializer),
+        'songs': (Song.objects.order_by('pk'), SongSerializer),
+    }
+
+
+def _cache():
+    return caches[settings.CATALOG_CACHE]
+
+
+def _version_key(name):
+    return f'catalog:version:{name}'
+
+
+def _entry_key(name, version):
+    return f'catalog:{name}:{version}'
+
+
+def _etag(body):
+    return f'"{hashlib.md5(body, usedforsecurity=False).hexdigest()}"'
+
+
+def _encode(items):
+    body = JSONRenderer().render(items)
+    return body, _etag(body)
+
+
+def catalog_version(name):
+    cache = _cache()
+    version = cache.get(_version_key(name))
+    if version is None:
+        version = uuid.uuid4().hex
+        # add(): a concurrent first reader may have set one already
+        if not cache.add(_version_key(name), version, None):
+            version = cache.get(_version_key(name), version)
+    return version
+
+
+def bump_catalog(*names):
+    """Invalidate the cached catalogs (all of them without arguments)."""
+    names = names or tuple(_catalogs())
+    _cache().set_many({_version_key(name): uuid.uuid4().hex for name in names}, None)
+
+
+def build_catalog(name):
+    """
+    {(category, ordering): (body, etag)} for every category (ALL for the full
+    list) in the default order (ordering None) and in each of ORDERINGS.
+    """
+    queryset, serializer_class = _catalogs()[name]
+    items = serializer_class(queryset, many=True).data
+    by_category = {ALL: items}
+    for item in items:
+        by_category.setdefault(item['category'], []).append(item)
+
+    entry = {}
+    for category, category_items in by_category.items():
+        entry[category, None] = _encode(category_items)
+        for ordering, (sort_key, reverse) in ORDERINGS.items():
+            # Stable sort: ties keep the default (pk) order
+            entry[category, ordering] = _encode(sorted(category_items, key=sort_key, reverse=reverse))
+    return entry
+
+
+def get_catalog(name, category=None, ordering=None):
+    """(body, etag) of the catalog, optionally only the given category and/or sorted."""
+    cache = _cache()
+    key = _entry_key(name, catalog_version(name))
+    entry = cache.get(key)
+    if entry is None:
+        entry = build_catalog(name)
+        cache.set(key, entry, settings.CATALOG_CACHE_TIMEOUT)
+
+    if ordering not in ORDERINGS:
+        ordering = None
+    # Unknown categories are an empty list, served from the cache too
+    return entry.get((category or ALL, ordering)) or _encode([])
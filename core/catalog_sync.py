@@ -0,0 +1,154 @@
+"""
+Bulk, idempotent loader for the Template/Song catalogs.
+
+Rows are streamed from a JSON, NDJSON or CSV source, diffed against the
+existing table (read once), and only new or changed rows are written with one
+upsert (`bulk_create(update_conflicts=True)`) inside a single transaction.
+Runtime-maintained columns (used_count) are only set for new rows and never
+overwritten on existing ones.
+"""
+import csv
+import json
+import os
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from .catalog import bump_catalog
+from .models import Template, Song
+from .signals import catalog_items_updated
+
+SOURCE_FORMATS = ('json', 'ndjson', 'csv')
+
+
+def source_format(path):
+    ext = os.path.splitext(path)[1].lower().lstrip('.')
+    if ext == 'jsonl':
+        return 'ndjson'
+    return ext if ext in SOURCE_FORMATS else None
+
+
+def iter_source(path, fmt=None):
+    """Yield row dicts from a catalog file (JSON array, NDJSON or CSV with a header)."""
+    fmt = fmt or source_format(path)
+    if fmt == 'json':
+        with open(path, encoding='utf-8') as f:
+            yield from json.load(f)
+    elif fmt == 'ndjson':
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    elif fmt == 'csv':
+        with open(path, encoding='utf-8-sig', newline='') as f:
+            yield from csv.DictReader(f)
+    else:
+        raise ValueError(f'Unsupported catalog file: {path}')
+
+
+class CatalogSync:
+    """
+    Sync one catalog model from source rows. `fields` are the columns the
+    source owns; `preserve` are only written when a row is created.
+    """
+    batch_size = 500
+
+    def __init__(self, model, fields, catalog_name, preserve=('used_count',)):
+        self.model = model
+        self.catalog_name = catalog_name
+        self.pk_name = model._meta.pk.name
+        self.fields = [name for name in fields if name != self.pk_name]
+        self.preserve = [name for name in preserve if name not in self.fields]
+
+    def clean(self, row):
+        """Source row -> {field: python value}, raising ValidationError on bad input."""
+        opts = self.model._meta
+        pk = str(row.get(self.pk_name) or '').strip()
+        if not pk:
+            raise ValidationError({self.pk_name: 'This field is required.'})
+
+        cleaned = {self.pk_name: pk}
+        for name in self.fields:
+            field = opts.get_field(name)
+            value = row.get(name)
+            if value in (None, '') and field.has_default():
+                value = field.get_default()
+            cleaned[name] = field.clean(field.to_python(value), None)
+        for name in self.preserve:
+            # Only used for new rows; missing means the model default
+            if row.get(name) not in (None, ''):
+                field = opts.get_field(name)
+                cleaned[name] = field.clean(field.to_python(row[name]), None)
+        return cleaned
+
+    def sync(self, rows, dry_run=False):
+        """
+        Apply the source rows. Returns a summary dict with created/updated/
+        unchanged counts and per-row errors ({'row', 'errors'}, 1-based).
+        """
+        existing = {
+            values[self.pk_name]: values
+            for values in self.model.objects.values(self.pk_name, *self.fields)
+        }
+
+        summary = {'created': [], 'updated': [], 'unchanged': 0, 'errors': []}
+        pending = {}
+        for index, row in enumerate(rows, start=1):
+            try:
+                cleaned = self.clean(row)
+            except ValidationError as e:
+                summary['errors'].append({'row': index, 'errors': e.message_dict})
+                continue
+            pk = cleaned[self.pk_name]
+            # Later rows win, like running update_or_create per row would
+            pending[pk] = cleaned
+
+        to_create, to_update = [], []
+        for pk, cleaned in pending.items():
+            current = existing.get(pk)
+            if current is None:
+                to_create.append(cleaned)
+                summary['created'].append(pk)
+            elif any(current[name] != cleaned[name] for name in self.fields):
+                to_update.append(cleaned)
+                summary['updated'].append(pk)
+            else:
+                summary['unchanged'] += 1
+
+        if not dry_run and (to_create or to_update):
+            with transaction.atomic():
+                # One upsert: new rows are inserted with their preserved fields,
+                # existing rows only get the source-owned fields updated
+                self.model.objects.bulk_create(
+                    [self.model(**values) for values in to_create + to_update],
+                    batch_size=self.batch_size,
+                    update_conflicts=True,
+                    unique_fields=[self.pk_name],
+                    update_fields=self.fields
+                )
+                transaction.on_commit(lambda: bump_catalog(self.catalog_name))
+                if to_update:
+                    # No post_save from the upsert: tell dependents which rows changed
+                    catalog_items_updated.send(sender=self.model, pks=summary['updated'])
+        return summary
+
+
+def template_sync():
+    return CatalogSync(Template, ['name', 'category', 'path'], 'templates')
+
+
+def song_sync():
+    return CatalogSync(Song, ['name', 'singer', 'category', 'path'], 'songs')
+
+
+def summary_lines(label, summary, dry_run=False):
+    """Human-readable lines for a sync summary (used by the management commands)."""
+    prefix = '[dry-run] ' if dry_run else ''
+    yield (
+        f"{prefix}{label}: {len(summary['created'])} created, {len(summary['updated'])} updated, "
+        f"{summary['unchanged']} unchanged, {len(summary['errors'])} invalid"
+    )
+    for pk in summary['created']:
+        yield f'  + {pk}'
+    for pk in summary['updated']:
+        yield f'  ~ {pk}'
+    for error in summary['errors']:
+        yield f"  ! row {error['row']}: {error['errors']}"
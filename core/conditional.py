@@ -0,0 +1,73 @@
+"""
+Conditional GET for polled list/detail endpoints.
+
+The ETag is derived from a cheap version stamp aggregated in the database
+(row count + latest `updated_at`, plus whatever `get_version_aggregates` adds),
+so an unchanged resource is answered with 304 before anything is serialized.
+"""
+import hashlib
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Max
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+
+class ConditionalGetMixin:
+    def get_version_aggregates(self):
+        return {
+            'count': Count('pk'),
+            'latest': Max('updated_at'),
+        }
+
+    def get_version_stamp(self, queryset):
+        # Strip eager loading/ordering: only the aggregate is needed here
+        return queryset.select_related(None).prefetch_related(None).order_by().aggregate(
+            **self.get_version_aggregates()
+        )
+
+    def get_etag(self, queryset):
+        stamp = self.get_version_stamp(queryset)
+        if not stamp.get('count'):
+            return None
+        request = self.request
+        parts = [
+            str(request.user.pk),  # Payload is per user (roles, tickets)
+            request.get_full_path(),
+            getattr(request.accepted_renderer, 'format', ''),
+        ] + [str(stamp[key]) for key in sorted(stamp)]
+        return '"%s"' % hashlib.md5('|'.join(parts).encode(), usedforsecurity=False).hexdigest()
+
+    def _not_modified(self, etag):
+        if_none_match = self.request.headers.get('If-None-Match')
+        if not etag or not if_none_match:
+            return False
+        etags = parse_etags(if_none_match)
+        # Weak comparison, as required for If-None-Match
+        return '*' in etags or etag.removeprefix('W/') in {e.removeprefix('W/') for e in etags}
+
+    def _conditional(self, get_queryset, render, *args, **kwargs):
+        try:
+            etag = self.get_etag(get_queryset())
+        except (TypeError, ValueError, ValidationError):
+            # Malformed lookup value: let the regular view answer 404
+            etag = None
+        if self._not_modified(etag):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+        response = render(self.request, *args, **kwargs)
+        if etag and response.status_code == status.HTTP_200_OK:
+            response['ETag'] = etag
+        return response
+
+    def list(self, request, *args, **kwargs):
+        def get_queryset():
+            return self.filter_queryset(self.get_queryset())
+        return self._conditional(get_queryset, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        def get_queryset():
+            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+            return self.filter_queryset(self.get_queryset()).filter(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            )
+        return self._conditional(get_queryset, super().retrieve, *args, **kwargs)
@@ -0,0 +1,84 @@
+"""
+Primary/replica routing and SQLite connection tuning.
+
+Reads go to the primary unless the current code opted in to replica reads
+with `replica_reads()`, and once anything was written during the request
+every later read is pinned to the primary so the request sees its own
+writes. The state lives in context variables that
+DatabaseRoutingMiddleware resets per request; management commands and
+background threads never read from replicas.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+
+_replica_reads = ContextVar('replica_reads', default=False)
+_pinned = ContextVar('pinned_to_primary', default=False)
+
+SQLITE_PRAGMAS = (
+    # WAL lets readers run alongside the single writer
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    # No busy_timeout here: OPTIONS['timeout'] (DB_SQLITE_TIMEOUT) sets it
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA cache_size=-20000',
+)
+
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES if alias.startswith('replica_')]
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if not _replica_reads.get() or _pinned.get():
+            return 'default'
+        replicas = replica_aliases()
+        return random.choice(replicas) if replicas else 'default'
+
+    def db_for_write(self, model, **hints):
+        # Read-your-writes for the rest of the request
+        _pinned.set(True)
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas mirror the primary, objects from either may be related
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
+
+
+@contextmanager
+def replica_reads():
+    """Let reads inside the block go to a replica (unless pinned to the primary)."""
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+class DatabaseRoutingMiddleware:
+    """Start every request on the primary with no pin."""
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        replica_token = _replica_reads.set(False)
+        pinned_token = _pinned.set(False)
+        try:
+            return self.get_response(request)
+        finally:
+            _replica_reads.reset(replica_token)
+            _pinned.reset(pinned_token)
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """connection_created handler: WAL and tuned pragmas for SQLite."""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for pragma in SQLITE_PRAGMAS:
+            cursor.execute(pragma)
@@ -0,0 +1,42 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from core.caches import process_local_warning
+from core.catalog import bump_catalog
+from core.usage import CATALOG_NAMES, flush_usage
+
+class Command(BaseCommand):
+    help = 'Fold pending template/song usage increments into used_count'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Counter rows flushed per transaction (default: 1000)')
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep running, flushing every --interval seconds')
+        parser.add_argument('--interval', type=int, default=60,
+                            help='Seconds between runs in --loop mode (default: 60)')
+
+    def handle(self, *args, **options):
+        # Bumps made here only reach the server through a shared cache
+        self.cache_warning = process_local_warning(settings.CATALOG_CACHE)
+        while True:
+            self.flush(options)
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+    def flush(self, options):
+        started = time.monotonic()
+        flushed = flush_usage(batch_size=options['batch_size'])
+
+        # New counts change the catalog payload (usedCount, ?ordering=popular)
+        changed = [CATALOG_NAMES[kind] for kind, count in flushed.items() if count]
+        if changed:
+            bump_catalog(*changed)
+            if self.cache_warning:
+                self.stderr.write(self.style.WARNING(self.cache_warning))
+                self.cache_warning = None # Once per run, not every --loop tick
+
+        elapsed = time.monotonic() - started
+        summary = ', '.join(f'{count} {kind}s' for kind, count in flushed.items())
+        self.stdout.write(self.style.SUCCESS(f'Flushed usage counters: {summary} ({elapsed:.2f}s)'))
@@ -1,34 +1,37 @@
-import json
 import os
 from django.core.management.base import BaseCommand
-from core.models import Template
+from core.catalog_sync import iter_source, source_format, summary_lines, template_sync
 from django.conf import settings
+from core.caches import process_local_warning
 
 class Command(BaseCommand):
-    help = 'Load themes from themes.json'
+    help = 'Load themes from themes.json (or another JSON/NDJSON/CSV catalog file)'
 
-    def handle(self, *args, **kwargs):
-        json_path = os.path.join(settings.BASE_DIR, 'themes.json')
+    def add_arguments(self, parser):
+        parser.add_argument('--file', default=os.path.join(settings.BASE_DIR, 'themes.json'),
+                            help='Catalog file (default: themes.json in the project root)')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Only report what would be created/updated')
+
+    def handle(self, *args, **options):
+        json_path = options['file']
         
         if not os.path.exists(json_path):
             self.stdout.write(self.style.ERROR(f'File not found: {json_path}'))
             return
+        if source_format(json_path) is None:
+            self.stdout.write(self.style.ERROR(f'Unsupported file type (expected .json, .ndjson or .csv): {json_path}'))
+            return
+
+        # One diff query and one upsert; used_count is left to the usage counters
+        summary = template_sync().sync(iter_source(json_path), dry_run=options['dry_run'])
 
-        with open(json_path, 'r') as f:
-            themes = json.load(f)
+        style = self.style.WARNING if summary['errors'] else self.style.SUCCESS
+        for line in summary_lines('Themes', summary, options['dry_run']):
+            self.stdout.write(style(line))
 
-        for theme_data in themes:
-            theme, created = Template.objects.update_or_create(
-                id_theme=theme_data['id_theme'],
-                defaults={
-                    'name': theme_data['name'],
-                    'category': theme_data['category'],
-                    'path': theme_data['path'],
-                    'used_count': theme_data.get('used_count', 0)
-                }
-            )
-            
-            if created:
-                self.stdout.write(self.style.SUCCESS(f'Created theme: {theme.name}'))
-            else:
-                self.stdout.write(self.style.SUCCESS(f'Updated theme: {theme.name}'))
+        if (summary['created'] or summary['updated']) and not options['dry_run']:
+            # The catalog version bump and render invalidation happen in this process
+            warning = process_local_warning(settings.CATALOG_CACHE, settings.INVITATION_RENDER_CACHE)
+            if warning:
+                self.stderr.write(self.style.WARNING(warning))
@@ -1,10 +1,17 @@
+from django.conf import settings
 from django.core.management.base import BaseCommand
-from core.models import Template, Song
+from core.caches import process_local_warning
+from core.catalog_sync import song_sync, summary_lines, template_sync
 
 class Command(BaseCommand):
     help = 'Seeds database with initial Template and Song data'
 
-    def handle(self, *args, **kwargs):
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Only report what would be created/updated')
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
         self.stdout.write('Seeding data...')
 
         # Seed Songs
@@ -25,15 +32,9 @@ class Command(BaseCommand):
             }
         ]
 
-        for song_data in songs:
-            song, created = Song.objects.update_or_create(
-                id_song=song_data['id_song'],
-                defaults=song_data
-            )
-            if created:
-                self.stdout.write(self.style.SUCCESS(f'Created song: {song.name}'))
-            else:
-                self.stdout.write(f'Updated song: {song.name}')
+        song_summary = song_sync().sync(songs, dry_run=dry_run)
+        for line in summary_lines('Songs', song_summary, dry_run):
+            self.stdout.write(line)
 
         # Seed Templates
         templates = [
@@ -53,14 +54,16 @@ class Command(BaseCommand):
             }
         ]
 
-        for template_data in templates:
-            tmpl, created = Template.objects.update_or_create(
-                id_theme=template_data['id_theme'],
-                defaults=template_data
-            )
-            if created:
-                self.stdout.write(self.style.SUCCESS(f'Created template: {tmpl.name}'))
-            else:
-                self.stdout.write(f'Updated template: {tmpl.name}')
+        # used_count above only seeds new rows, existing counts are kept
+        template_summary = template_sync().sync(templates, dry_run=dry_run)
+        for line in summary_lines('Templates', template_summary, dry_run):
+            self.stdout.write(line)
+
+        changed = any(summary['created'] or summary['updated'] for summary in (song_summary, template_summary))
+        if changed and not dry_run:
+            # The catalog version bump and render invalidation happen in this process
+            warning = process_local_warning(settings.CATALOG_CACHE, settings.INVITATION_RENDER_CACHE)
+            if warning:
+                self.stderr.write(self.style.WARNING(warning))
 
         self.stdout.write(self.style.SUCCESS('Seeding completed successfully.'))
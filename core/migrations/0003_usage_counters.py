@@ -0,0 +1,31 @@
+# Generated by Django 6.0 on 2026-10-18 16:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_alter_song_path'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='song',
+            name='used_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='UsageShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('template', 'Template'), ('song', 'Song')], max_length=20)),
+                ('object_id', models.CharField(max_length=100)),
+                ('shard', models.PositiveSmallIntegerField()),
+                ('delta', models.IntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('kind', 'object_id', 'shard'), name='unique_usage_shard')],
+            },
+        ),
+    ]
@@ -14,8 +14,32 @@ class Song(models.Model):
     id_song = models.CharField(max_length=100, primary_key=True)
     name = models.CharField(max_length=100)
     singer = models.CharField(max_length=100)
+    used_count = models.IntegerField(default=0)
     category = models.CharField(max_length=50)
     path = models.CharField(max_length=500) # URL File MP3
 
     def __str__(self):
-        return f"{self.name} - {self.singer}"
\ No newline at end of file
+        return f"{self.name} - {self.singer}"
+
+class UsageShard(models.Model):
+    """
+    Pending used_count increments for templates/songs, spread over a few
+    rows per item so concurrent selections don't queue on one hot row.
+    Folded into used_count by the flush_usage_counters command (core/usage.py).
+    """
+    KIND_CHOICES = (
+        ('template', 'Template'),
+        ('song', 'Song'),
+    )
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.CharField(max_length=100)
+    shard = models.PositiveSmallIntegerField()
+    delta = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id', 'shard'], name='unique_usage_shard'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind}:{self.object_id}#{self.shard} {self.delta:+d}"
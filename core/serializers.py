@@ -11,7 +11,31 @@ class TemplateSerializer(serializers.ModelSerializer):
 
 class SongSerializer(serializers.ModelSerializer):
     idSong = serializers.CharField(source='id_song')
+    usedCount = serializers.IntegerField(source='used_count', read_only=True)
 
     class Meta:
         model = Song
-        fields = ['idSong', 'name', 'singer', 'category', 'path']
+        fields = ['idSong', 'name', 'singer', 'usedCount', 'category', 'path']
+
+class SparseFieldsetMixin:
+    """
+    Lets clients ask for a slim payload with `?fields=a,b,c` on GET requests.
+    Unknown names are ignored; without the parameter every field is returned.
+    """
+    fields_query_param = 'fields'
+
+    @classmethod
+    def requested_fields(cls, request):
+        if request is None or request.method != 'GET':
+            return None
+        raw = request.query_params.get(cls.fields_query_param)
+        if not raw:
+            return None
+        return {name.strip() for name in raw.split(',') if name.strip()}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        requested = self.requested_fields(self.context.get('request'))
+        if requested:
+            for name in set(self.fields) - requested:
+                self.fields.pop(name)
@@ -0,0 +1,19 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import Signal, receiver
+from .models import Template, Song
+from .catalog import bump_catalog
+
+# Bulk writes (management commands) send no post_save and bump explicitly.
+# They send this instead for rows that already existed, with `pks`, so
+# dependents (the invitation render cache) can drop what they derived from them.
+catalog_items_updated = Signal()
+
+@receiver(post_save, sender=Template)
+@receiver(post_delete, sender=Template)
+@receiver(post_save, sender=Song)
+@receiver(post_delete, sender=Song)
+def catalog_changed(sender, instance, **kwargs):
+    name = 'templates' if sender is Template else 'songs'
+    # After commit, so a concurrent reader cannot re-cache the old rows
+    transaction.on_commit(lambda: bump_catalog(name))
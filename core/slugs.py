@@ -0,0 +1,54 @@
+"""
+Slug allocation shared by invitations and guests.
+
+Instead of probing with `.exists()` until a free slug is found, the row is
+inserted straight away and the unique index arbitrates: a free slug costs one
+INSERT, a taken one costs one more INSERT with a random suffix. Concurrent
+creates can no longer race past a check and fail on the index.
+"""
+import secrets
+from django.db import IntegrityError, transaction
+from django.utils.text import slugify
+
+
+def suffixed_slug(base, max_length, suffix_length=8):
+    suffix = secrets.token_hex(suffix_length // 2 + 1)[:suffix_length]
+    return f"{base[:max_length - suffix_length - 1].rstrip('-')}-{suffix}"
+
+
+def slug_base(text, fallback, max_length):
+    return slugify(text)[:max_length].rstrip('-') or fallback
+
+
+def save_with_unique_slug(instance, text, fallback, scope=(), always_suffix=False,
+                          suffix_length=8, attempts=5, field='slug', **save_kwargs):
+    """
+    Save `instance` with a slug derived from `text` that is unique within
+    `scope` (field names that, together with `field`, form a unique constraint).
+
+    The first candidate is the plain slug (unless `always_suffix`), later ones
+    get a random hex suffix. Each attempt runs in a savepoint so a collision
+    does not break the surrounding transaction.
+    """
+    model = type(instance)
+    max_length = model._meta.get_field(field).max_length
+    base = slug_base(text, fallback, max_length)
+
+    for attempt in range(attempts):
+        if attempt == 0 and not always_suffix:
+            candidate = base
+        else:
+            candidate = suffixed_slug(base, max_length, suffix_length)
+        setattr(instance, field, candidate)
+        try:
+            with transaction.atomic():
+                instance.save(**save_kwargs)
+            return instance
+        except IntegrityError:
+            # Only retry on an actual slug collision, anything else is a real error
+            lookup = {field: candidate}
+            lookup.update({name: getattr(instance, name) for name in scope})
+            if not model.objects.filter(**lookup).exclude(pk=instance.pk).exists():
+                raise
+
+    raise IntegrityError(f"Could not allocate a unique {field} for {model.__name__} after {attempts} attempts")
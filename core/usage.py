@@ -0,0 +1,87 @@
+"""
+Sharded usage counters for Template/Song.used_count.
+
+Selections are recorded as relative increments (F('delta') + 1) on one of
+USAGE_COUNTER_SHARDS rows per item, picked at random, so concurrent writers
+rarely wait on the same row and no update is lost to a read-modify-write.
+`flush_usage` folds the pending deltas into used_count with F() expressions;
+run it periodically with `manage.py flush_usage_counters --loop`.
+"""
+import random
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from .models import Template, Song, UsageShard
+
+MODELS = {
+    'template': Template,
+    'song': Song,
+}
+CATALOG_NAMES = {
+    'template': 'templates',
+    'song': 'songs',
+}
+
+
+def record_usage(kind, object_id, amount=1):
+    """Add `amount` to the pending used_count of one template/song."""
+    if object_id is None:
+        return
+    shard = random.randrange(settings.USAGE_COUNTER_SHARDS)
+    lookup = {'kind': kind, 'object_id': object_id, 'shard': shard}
+    if UsageShard.objects.filter(**lookup).update(delta=F('delta') + amount):
+        return
+    try:
+        # Savepoint: a concurrent first increment may create the row first
+        with transaction.atomic():
+            UsageShard.objects.create(delta=amount, **lookup)
+    except IntegrityError:
+        UsageShard.objects.filter(**lookup).update(delta=F('delta') + amount)
+
+
+def _case(values, output_field=IntegerField()):
+    # {pk: value} -> CASE WHEN pk=.. THEN .. END, one UPDATE for many rows
+    return Case(
+        *[When(pk=pk, then=Value(value)) for pk, value in values.items()],
+        default=Value(0),
+        output_field=output_field
+    )
+
+
+def flush_usage(kinds=None, batch_size=1000):
+    """
+    Move pending deltas into used_count. Returns {kind: number of items updated}.
+    Deltas are subtracted rather than reset, so increments recorded while a
+    flush runs are kept for the next one.
+    """
+    flushed = {}
+    for kind in kinds or MODELS:
+        model = MODELS[kind]
+        updated = 0
+        last_pk = 0
+        while True:
+            pending = list(
+                UsageShard.objects
+                .filter(kind=kind, pk__gt=last_pk)
+                .exclude(delta=0)
+                .order_by('pk')
+                .values_list('pk', 'object_id', 'delta')[:batch_size]
+            )
+            if not pending:
+                break
+            last_pk = pending[-1][0]
+
+            totals = {}
+            for _, object_id, delta in pending:
+                totals[object_id] = totals.get(object_id, 0) + delta
+
+            with transaction.atomic():
+                UsageShard.objects.filter(pk__in=[pk for pk, _, _ in pending]).update(
+                    delta=F('delta') - _case({pk: delta for pk, _, delta in pending})
+                )
+                model.objects.filter(pk__in=totals).update(
+                    used_count=F('used_count') + _case(totals)
+                )
+            updated += len(totals)
+        flushed[kind] = updated
+    return flushed
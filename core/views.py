@@ -1,16 +1,45 @@
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
 from rest_framework import viewsets, mixins
 from .models import Template, Song
 from .serializers import TemplateSerializer, SongSerializer
+from .catalog import get_catalog
 
-class TemplateViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+
+class CatalogListMixin(mixins.ListModelMixin):
+    """
+    Serves `list` from the versioned catalog cache (core/catalog.py) as
+    pre-encoded JSON, filterable with `?category=` and sortable with
+    `?ordering=popular` (by used_count).
+    """
+    catalog_name = None
+
+    def list(self, request, *args, **kwargs):
+        body, etag = get_catalog(
+            self.catalog_name,
+            category=request.query_params.get('category'),
+            ordering=request.query_params.get('ordering')
+        )
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = HttpResponse(body, content_type='application/json')
+        response['ETag'] = etag
+        patch_cache_control(response, public=True, max_age=settings.CATALOG_MAX_AGE)
+        return response
+
+
+class TemplateViewSet(CatalogListMixin, viewsets.GenericViewSet):
     """
     API endpoint that allows templates to be viewed.
     """
     queryset = Template.objects.all()
     serializer_class = TemplateSerializer
     permission_classes = [] # Allow public access for now, or adjust as needed
+    catalog_name = 'templates'
 
-class SongViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+class SongViewSet(CatalogListMixin, viewsets.GenericViewSet):
     queryset = Song.objects.all()
     serializer_class = SongSerializer
     permission_classes = []
+    catalog_name = 'songs'
@@ -0,0 +1,59 @@
+"""
+Greetings wall reads and writes.
+
+The wall is read newest first with keyset pagination over
+(invitation, -created_at, -id), so any page costs one index range scan. The
+first page of each invitation, the one every guest sees, is cached and
+dropped whenever a greeting is added.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework import serializers
+from core.pagination import KeysetPagination
+from .models import Greeting
+
+
+class GreetingSerializer(serializers.ModelSerializer):
+    createdAt = serializers.DateTimeField(source='created_at', read_only=True)
+
+    class Meta:
+        model = Greeting
+        fields = ['id', 'name', 'message', 'createdAt']
+
+
+class GreetingPagination(KeysetPagination):
+    page_size = 20
+    max_page_size = 100
+
+
+def _cache():
+    return caches[settings.GREETING_WALL_CACHE]
+
+
+def _latest_key(invitation_id):
+    return f'greetings:latest:{invitation_id}'
+
+
+def latest_page(invitation_id, paginator, request, view):
+    """First wall page: (serialized greetings, last row's cursor or None), cached."""
+    key = _latest_key(invitation_id)
+    page = _cache().get(key)
+    if page is None:
+        rows = paginator.paginate_queryset(
+            Greeting.objects.filter(invitation_id=invitation_id), request, view=view
+        )
+        page = {
+            'results': GreetingSerializer(rows, many=True).data,
+            'cursor': paginator.encode_cursor(paginator.last) if paginator.has_next else None,
+        }
+        _cache().set(key, page, settings.GREETING_WALL_CACHE_TIMEOUT)
+    return page
+
+
+def add_greeting(invitation_id, guest_id, name, message):
+    greeting = Greeting.objects.create(
+        invitation_id=invitation_id, guest_id=guest_id, name=name, message=message
+    )
+    transaction.on_commit(lambda: _cache().delete(_latest_key(invitation_id)))
+    return greeting
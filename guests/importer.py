@@ -0,0 +1,184 @@
+"""
+Set-based guest import used by `bulk_create_guests` (and file uploads).
+
+Rows are validated one by one without touching the database, permissions are
+checked once per distinct invitation with a single query, WhatsApp numbers
+are checked against one lookup of taken numbers, slugs are generated in
+memory against one lookup of taken slugs, and the guests are written with
+chunked bulk_create inside one transaction, along with one InvitationStats
+delta per invitation. Invalid rows are reported per row instead of failing
+the whole batch, and so are rows whose slug or number a concurrent write
+took between the checks and the insert: each chunk is inserted in a
+savepoint and retried without them.
+"""
+from django.db import IntegrityError, transaction
+from rest_framework import serializers
+from core.slugs import slug_base, suffixed_slug
+from invitations.permissions import RoleResolver
+from .models import Guest
+from .stats import StatsDelta, snapshot
+from .serializers import DUPLICATE_WA, GuestSerializer
+
+DUPLICATE_SLUG = 'This slug is already used in this invitation.'
+
+
+class GuestImportRowSerializer(GuestSerializer):
+    # Plain id: invitations are resolved for the whole batch at once
+    invitation = serializers.UUIDField()
+
+    def validate(self, attrs):
+        # Slug clashes are checked set-wise by GuestImporter
+        return attrs
+
+
+class GuestImporter:
+    chunk_size = 500
+    slug_suffix_length = 6
+
+    def __init__(self, user, resolver=None):
+        self.user = user
+        self.resolver = resolver or RoleResolver(user)
+
+    def editable_invitations(self, invitation_ids):
+        """Ids of the given invitations the user may add guests to (one query)."""
+        return self.resolver.editable(invitation_ids)
+
+    def import_rows(self, rows, offset=0):
+        """
+        Create guests from raw row dicts. Returns (created guests, errors) where
+        each error is {'row': index, 'errors': {...}} (index counted from `offset`).
+        """
+        errors = []
+        valid = []
+        for index, row in enumerate(rows, start=offset):
+            serializer = GuestImportRowSerializer(data=row)
+            if serializer.is_valid():
+                valid.append((index, serializer.validated_data))
+            else:
+                errors.append({'row': index, 'errors': serializer.errors})
+
+        allowed = self.editable_invitations({data['invitation'] for _, data in valid})
+        permitted = []
+        for index, data in valid:
+            if data['invitation'] in allowed:
+                permitted.append((index, data))
+            else:
+                errors.append({'row': index, 'errors': {
+                    'invitation': ['You do not have permission to add guests to this invitation.']
+                }})
+
+        permitted = self.reject_duplicate_numbers(permitted, errors)
+        guests = self.assign_slugs(permitted, errors)
+        created = []
+        with transaction.atomic():
+            for start in range(0, len(guests), self.chunk_size):
+                created.extend(self.create_chunk(guests[start:start + self.chunk_size], errors))
+            stats = StatsDelta()
+            for guest in created:
+                stats.add(snapshot(guest))
+            stats.apply()
+
+        errors.sort(key=lambda error: error['row'])
+        return created, errors
+
+    def create_chunk(self, chunk, errors):
+        """Insert (index, guest) pairs; returns the guests that were created."""
+        while chunk:
+            try:
+                with transaction.atomic():
+                    Guest.objects.bulk_create([guest for _, guest in chunk])
+                break
+            except IntegrityError:
+                # A concurrent write took a slug or number after our checks
+                remaining = self.drop_taken(chunk, errors)
+                if len(remaining) == len(chunk):
+                    raise
+                chunk = remaining
+        return [guest for _, guest in chunk]
+
+    def drop_taken(self, chunk, errors):
+        """Report the pairs whose slug or number is now taken; returns the others."""
+        invitation_ids = {guest.invitation_id for _, guest in chunk}
+        taken_slugs = set(
+            Guest.objects.filter(
+                invitation_id__in=invitation_ids, slug__in={guest.slug for _, guest in chunk}
+            ).values_list('invitation_id', 'slug')
+        )
+        taken_numbers = set(
+            Guest.objects.filter(
+                invitation_id__in=invitation_ids, wa__in={guest.wa for _, guest in chunk if guest.wa}
+            ).values_list('invitation_id', 'wa')
+        )
+        remaining = []
+        for index, guest in chunk:
+            if (guest.invitation_id, guest.slug) in taken_slugs:
+                errors.append({'row': index, 'errors': {'slug': [DUPLICATE_SLUG]}})
+            elif guest.wa and (guest.invitation_id, guest.wa) in taken_numbers:
+                errors.append({'row': index, 'errors': {'wa': [DUPLICATE_WA]}})
+            else:
+                remaining.append((index, guest))
+        return remaining
+
+    def reject_duplicate_numbers(self, rows, errors):
+        """
+        Drop rows whose (already canonical) number is taken in their invitation,
+        by an existing guest (one query for the batch) or an earlier row.
+        """
+        taken = set(
+            Guest.objects.filter(
+                invitation_id__in={data['invitation'] for _, data in rows},
+                wa__in={data['wa'] for _, data in rows}
+            ).values_list('invitation_id', 'wa')
+        ) if rows else set()
+        unique = []
+        for index, data in rows:
+            key = (data['invitation'], data['wa'])
+            if key in taken:
+                errors.append({'row': index, 'errors': {'wa': [DUPLICATE_WA]}})
+                continue
+            taken.add(key)
+            unique.append((index, data))
+        return unique
+
+    def assign_slugs(self, rows, errors):
+        """
+        Build unsaved (index, Guest) pairs with slugs unique per invitation. Generated
+        slugs get a random suffix in memory; one query per round checks them
+        (and explicit slugs) against the table, and only the rare collisions
+        go another round.
+        """
+        max_length = Guest._meta.get_field('slug').max_length
+        pending = []
+        for index, data in rows:
+            data = dict(data)
+            invitation_id = data.pop('invitation')
+            explicit = data.pop('slug', '')
+            base = slug_base(data.get('name', ''), 'guest', max_length)
+            slug = explicit or suffixed_slug(base, max_length, self.slug_suffix_length)
+            pending.append((index, invitation_id, data, base, slug, bool(explicit)))
+
+        guests = []
+        claimed = set()
+        while pending:
+            taken = set(
+                Guest.objects.filter(
+                    invitation_id__in={item[1] for item in pending},
+                    slug__in={item[4] for item in pending}
+                ).values_list('invitation_id', 'slug')
+            )
+            retry = []
+            for index, invitation_id, data, base, slug, explicit in pending:
+                key = (invitation_id, slug)
+                if key in taken or key in claimed:
+                    if explicit:
+                        errors.append({'row': index, 'errors': {'slug': [DUPLICATE_SLUG]}})
+                    else:
+                        slug = suffixed_slug(base, max_length, self.slug_suffix_length)
+                        retry.append((index, invitation_id, data, base, slug, explicit))
+                    continue
+                claimed.add(key)
+                guest = Guest(invitation_id=invitation_id, slug=slug, **data)
+                guest.normalize_fields()
+                guests.append((index, guest))
+            pending = retry
+        return guests
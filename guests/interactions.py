@@ -0,0 +1,172 @@
+"""
+Guest interaction ingestion (invitation opened, gift clicked, RSVP).
+
+The public endpoints only merge the event into an in-process buffer keyed by
+guest and return; a background thread flushes the buffer every
+GUEST_INTERACTION_FLUSH_INTERVAL seconds (or sooner once it holds
+GUEST_INTERACTION_MAX_PENDING guests). Repeated events for a guest are
+coalesced into one pending change, and each flush writes them with chunked
+bulk_update in one transaction (with the matching InvitationStats deltas),
+so a page open never waits on a row lock.
+Whatever is still buffered at shutdown is flushed by an atexit hook.
+"""
+import atexit
+import logging
+import threading
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from .models import Guest
+from .stats import SOURCE_FIELDS, StatsDelta
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+
+EVENTS = ('opened', 'gift', 'rsvp')
+
+
+class InteractionBuffer:
+    def __init__(self):
+        self.pending = {} # guest id -> {field: value}
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.thread = None
+
+    def add(self, guest_id, changes):
+        """Merge `changes` into the guest's pending state (later events win)."""
+        with self.lock:
+            pending = self.pending.setdefault(guest_id, {})
+            # First open wins: view_at records when the invitation was first seen
+            if 'view_at' in changes and 'view_at' in pending:
+                changes = {k: v for k, v in changes.items() if k != 'view_at'}
+            pending.update(changes)
+            size = len(self.pending)
+        self._ensure_flusher()
+        if size >= settings.GUEST_INTERACTION_MAX_PENDING:
+            self.wakeup.set()
+
+    def drain(self):
+        with self.lock:
+            pending, self.pending = self.pending, {}
+        return pending
+
+    def flush(self):
+        """Write everything buffered so far. Returns the number of guests updated."""
+        pending = self.drain()
+        if not pending:
+            return 0
+        try:
+            return apply_interactions(pending)
+        except Exception:
+            # Put the changes back (newer events win) and retry on the next tick
+            logger.exception('Flushing %d guest interactions failed', len(pending))
+            with self.lock:
+                for guest_id, changes in pending.items():
+                    merged = {**changes, **self.pending.get(guest_id, {})}
+                    if 'view_at' in changes:
+                        merged['view_at'] = changes['view_at']
+                    self.pending[guest_id] = merged
+            return 0
+
+    def _ensure_flusher(self):
+        if self.thread is not None and self.thread.is_alive():
+            return
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name='guest-interactions', daemon=True)
+                self.thread.start()
+
+    def _run(self):
+        while True:
+            self.wakeup.wait(settings.GUEST_INTERACTION_FLUSH_INTERVAL)
+            self.wakeup.clear()
+            try:
+                self.flush()
+            finally:
+                connection.close()  # Thread-local connection, not reused by Django
+
+
+def apply_interactions(pending):
+    """Apply {guest id: {field: value}} with bulk_update, grouped by changed fields."""
+    now = timezone.now()
+    groups = {}
+    for guest_id, changes in pending.items():
+        groups.setdefault(tuple(sorted(changes)), []).append((guest_id, changes))
+
+    updated = 0
+    with transaction.atomic():
+        stats = interaction_stats(pending)
+        for fields, items in groups.items():
+            guests = []
+            for guest_id, changes in items:
+                guest = Guest(id=guest_id, updated_at=now)
+                for field, value in changes.items():
+                    if field == 'view_at':
+                        # Keep an earlier open recorded by another process
+                        value = Coalesce(F('view_at'), Value(value))
+                    setattr(guest, field, value)
+                guests.append(guest)
+            # updated_at is listed explicitly: bulk_update skips auto_now
+            updated += Guest.objects.bulk_update(guests, [*fields, 'updated_at'], batch_size=BATCH_SIZE)
+        stats.apply()
+    return updated
+
+
+def interaction_stats(pending):
+    """
+    StatsDelta of applying `pending`, from the guests' current rows (locked
+    until the flush commits so the delta matches what is overwritten).
+    """
+    stats = StatsDelta()
+    guest_ids = list(pending)
+    changes = {str(guest_id): value for guest_id, value in pending.items()} # Ids arrive as strings
+    for start in range(0, len(guest_ids), BATCH_SIZE):
+        rows = (
+            Guest.objects
+            .select_for_update()
+            .filter(pk__in=guest_ids[start:start + BATCH_SIZE])
+            .values('id', *SOURCE_FIELDS)
+        )
+        for before in rows:
+            after = {**before, **changes[str(before['id'])]}
+            after['view_at'] = before['view_at'] or after['view_at']
+            stats.change(before, after)
+    return stats
+
+
+def event_changes(event, data):
+    """
+    Validate a public event payload and return the guest fields it sets,
+    or raise ValueError with a message for the client.
+    """
+    if event == 'opened':
+        return {'view_at': timezone.now()}
+    if event == 'gift':
+        return {'is_clicked_atm': True}
+    if event == 'rsvp':
+        rsvp = str(data.get('rsvp') or '').strip()
+        if not rsvp or len(rsvp) > Guest._meta.get_field('rsvp').max_length:
+            raise ValueError("'rsvp' is required (max 50 characters).")
+        changes = {'rsvp': rsvp}
+        pax = data.get('pax')
+        if pax not in (None, ''):
+            try:
+                pax = int(pax)
+            except (TypeError, ValueError):
+                raise ValueError("'pax' must be a number.")
+            if not 0 <= pax <= settings.GUEST_RSVP_MAX_PAX:
+                raise ValueError(f"'pax' must be between 0 and {settings.GUEST_RSVP_MAX_PAX}.")
+            changes['pax_confirmed'] = pax
+        return changes
+    raise ValueError(f"Unknown event '{event}'.")
+
+
+buffer = InteractionBuffer()
+atexit.register(buffer.flush)
+
+
+def record(guest_id, changes):
+    buffer.add(guest_id, changes)
@@ -0,0 +1,81 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from guests.models import InvitationStats
+from guests.stats import COUNTERS, recount
+from invitations.models import InvitationData
+
+
+class Command(BaseCommand):
+    help = 'Recount guest statistics per invitation and compare (or overwrite) the InvitationStats counters'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true',
+                            help='Only report drifted counters, exit with an error if any')
+        parser.add_argument('--invitation', action='append', default=[],
+                            help='Limit to this invitation id (repeatable)')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Invitations recounted per transaction (default: 500)')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        invitations = InvitationData.objects.order_by('pk').values_list('pk', flat=True)
+        if options['invitation']:
+            invitations = invitations.filter(pk__in=options['invitation'])
+
+        checked = drifted = missing = 0
+        last_pk = None
+        while True:
+            batch = invitations.filter(pk__gt=last_pk) if last_pk else invitations
+            batch = list(batch[:options['batch_size']])
+            if not batch:
+                break
+            last_pk = batch[-1]
+            checked += len(batch)
+            batch_drifted, batch_missing = self.rebuild(batch, options['check'])
+            drifted += batch_drifted
+            missing += batch_missing
+
+        elapsed = time.monotonic() - started
+        summary = (f'{checked} invitations checked, {drifted} with drifted counters, '
+                   f'{missing} without a stats row ({elapsed:.2f}s)')
+        if options['check'] and drifted:
+            raise CommandError(summary)
+        self.stdout.write(self.style.SUCCESS(summary))
+
+    def rebuild(self, invitation_ids, check_only):
+        with transaction.atomic():
+            # Lock the rows first: writers still in flight apply their delta
+            # after this batch commits, on top of the recount
+            current = {
+                stats.invitation_id: stats
+                for stats in InvitationStats.objects.select_for_update().filter(invitation_id__in=invitation_ids)
+            }
+            counts = recount(invitation_ids)
+
+            rows = []
+            drifted = 0
+            for invitation_id, expected in counts.items():
+                stats = current.get(invitation_id)
+                actual = {counter: getattr(stats, counter) for counter in COUNTERS} if stats else None
+                if actual == expected:
+                    continue
+                rows.append(InvitationStats(invitation_id=invitation_id, updated_at=timezone.now(), **expected))
+                if stats is not None:
+                    # A missing row is not drift: it is created from a recount on first use
+                    drifted += 1
+                    diff = ', '.join(
+                        f'{counter} {actual[counter]} -> {expected[counter]}'
+                        for counter in COUNTERS if actual[counter] != expected[counter]
+                    )
+                    self.stdout.write(f'{invitation_id}: {diff}')
+
+            if rows and not check_only:
+                InvitationStats.objects.bulk_create(
+                    rows,
+                    update_conflicts=True,
+                    unique_fields=['invitation'],
+                    update_fields=[*COUNTERS, 'updated_at']
+                )
+        return drifted, len(rows) - drifted
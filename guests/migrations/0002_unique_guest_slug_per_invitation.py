@@ -0,0 +1,36 @@
+# Generated by Django 6.0 on 2026-10-18 16:05
+
+import secrets
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def dedupe_guest_slugs(apps, schema_editor):
+    Guest = apps.get_model('guests', 'Guest')
+
+    duplicates = (
+        Guest.objects.values('invitation_id', 'slug')
+        .annotate(total=Count('id'))
+        .filter(total__gt=1)
+    )
+    for dup in duplicates:
+        # Keep the first guest on the slug, re-suffix the others
+        guests = Guest.objects.filter(invitation_id=dup['invitation_id'], slug=dup['slug']).order_by('id')
+        for guest in list(guests)[1:]:
+            guest.slug = f"{dup['slug'][:43].rstrip('-')}-{secrets.token_hex(3)}"
+            guest.save(update_fields=['slug'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('guests', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe_guest_slugs, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='guest',
+            constraint=models.UniqueConstraint(fields=('invitation', 'slug'), name='unique_guest_slug_per_invitation'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 16:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('guests', '0003_guest_updated_at'),
+        ('invitations', '0011_invitationdata_revision_invitationdata_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='guest',
+            index=models.Index(fields=['invitation', '-name', '-id'], name='guest_invitation_name_idx'),
+        ),
+    ]
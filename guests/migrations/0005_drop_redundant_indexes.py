@@ -0,0 +1,25 @@
+# Generated by Django 6.0 on 2026-10-18 16:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('guests', '0004_keyset_pagination_indexes'),
+        ('invitations', '0014_query_pattern_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='guest',
+            name='invitation',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='guests', to='invitations.invitationdata'),
+        ),
+        migrations.AlterField(
+            model_name='guest',
+            name='slug',
+            field=models.SlugField(db_index=False),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 6.0 on 2026-10-18 16:17
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('guests', '0005_drop_redundant_indexes'),
+        ('invitations', '0014_query_pattern_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Greeting',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=200)),
+                ('message', models.TextField()),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                # related_name is set in 0008, once Guest.greetings (the JSON column) is gone
+                ('guest', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='guests.guest')),
+                ('invitation', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='greetings', to='invitations.invitationdata')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['invitation', '-created_at', '-id'], name='greeting_wall_idx')],
+            },
+        ),
+    ]
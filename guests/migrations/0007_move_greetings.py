@@ -0,0 +1,65 @@
+from datetime import timedelta
+from django.db import migrations
+
+BATCH_SIZE = 1000
+
+
+def move_greetings(apps, schema_editor):
+    """Copy every Guest.greetings array into Greeting rows, in keyset batches."""
+    Guest = apps.get_model('guests', 'Guest')
+    Greeting = apps.get_model('guests', 'Greeting')
+
+    last_pk = None
+    while True:
+        guests = Guest.objects.order_by('pk')
+        if last_pk is not None:
+            guests = guests.filter(pk__gt=last_pk)
+        batch = list(guests.values_list('pk', 'invitation_id', 'name', 'greetings', 'updated_at')[:BATCH_SIZE])
+        if not batch:
+            break
+        last_pk = batch[-1][0]
+
+        greetings = []
+        for guest_id, invitation_id, name, messages, updated_at in batch:
+            messages = [str(message) for message in messages or [] if str(message).strip()]
+            for offset, message in enumerate(messages):
+                greetings.append(Greeting(
+                    invitation_id=invitation_id,
+                    guest_id=guest_id,
+                    name=name,
+                    message=message,
+                    # Original order, ending at the guest's last change
+                    created_at=updated_at - timedelta(microseconds=len(messages) - offset)
+                ))
+        Greeting.objects.bulk_create(greetings, batch_size=BATCH_SIZE)
+
+
+def restore_greetings(apps, schema_editor):
+    """Reverse: rebuild the arrays from Greeting rows that still have a guest."""
+    Guest = apps.get_model('guests', 'Guest')
+    Greeting = apps.get_model('guests', 'Greeting')
+
+    messages = {}
+    for guest_id, message in (
+        Greeting.objects.filter(guest__isnull=False)
+        .order_by('guest_id', 'created_at', 'id')
+        .values_list('guest_id', 'message')
+        .iterator(chunk_size=BATCH_SIZE)
+    ):
+        messages.setdefault(guest_id, []).append(message)
+
+    guest_ids = list(messages)
+    for start in range(0, len(guest_ids), BATCH_SIZE):
+        for guest_id in guest_ids[start:start + BATCH_SIZE]:
+            Guest.objects.filter(pk=guest_id).update(greetings=messages[guest_id])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('guests', '0006_greeting'),
+    ]
+
+    operations = [
+        migrations.RunPython(move_greetings, restore_greetings),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-18 16:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('guests', '0007_move_greetings'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='guest',
+            name='greetings',
+        ),
+        migrations.AlterField(
+            model_name='greeting',
+            name='guest',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='greetings', to='guests.guest'),
+        ),
+    ]
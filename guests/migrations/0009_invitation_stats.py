@@ -0,0 +1,30 @@
+# Generated by Django 6.0 on 2026-10-18 16:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('guests', '0008_remove_guest_greetings'),
+        ('invitations', '0014_query_pattern_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InvitationStats',
+            fields=[
+                ('invitation', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='invitations.invitationdata')),
+                ('guests', models.IntegerField(default=0)),
+                ('sent', models.IntegerField(default=0)),
+                ('viewed', models.IntegerField(default=0)),
+                ('gift_clicked', models.IntegerField(default=0)),
+                ('attending', models.IntegerField(default=0)),
+                ('declined', models.IntegerField(default=0)),
+                ('pax_requested', models.IntegerField(default=0)),
+                ('pax_confirmed', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
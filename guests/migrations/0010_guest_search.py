@@ -0,0 +1,72 @@
+# Generated by Django 6.0 on 2026-10-18 16:23
+
+import unicodedata
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+
+# Frozen copy of guests.search.fold_text, so later changes to it don't
+# change what this migration does
+def fold_text(value):
+    value = unicodedata.normalize('NFKD', value or '')
+    value = ''.join(char for char in value if not unicodedata.combining(char))
+    return ' '.join(value.casefold().split())
+
+
+def backfill_search_name(apps, schema_editor):
+    """Fill search_name of existing guests, in keyset batches."""
+    Guest = apps.get_model('guests', 'Guest')
+
+    last_pk = None
+    while True:
+        guests = Guest.objects.order_by('pk')
+        if last_pk is not None:
+            guests = guests.filter(pk__gt=last_pk)
+        batch = list(guests.only('pk', 'name')[:BATCH_SIZE])
+        if not batch:
+            break
+        last_pk = batch[-1].pk
+        for guest in batch:
+            guest.search_name = fold_text(guest.name)[:200]
+        Guest.objects.bulk_update(batch, ['search_name'], batch_size=BATCH_SIZE)
+
+
+def create_trigram_index(apps, schema_editor):
+    # Fuzzy name search, PostgreSQL only (the lookup needs pg_trgm)
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS guest_search_name_trgm_idx '
+        'ON guests_guest USING gin (search_name gin_trgm_ops)'
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS guest_search_name_trgm_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('guests', '0009_invitation_stats'),
+        ('invitations', '0014_query_pattern_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='guest',
+            name='search_name',
+            field=models.CharField(blank=True, default='', editable=False, max_length=200),
+        ),
+        # Before the index, so it is built once over the filled column
+        migrations.RunPython(backfill_search_name, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='guest',
+            index=models.Index(fields=['invitation', 'search_name'], name='guest_search_name_idx', opclasses=['uuid_ops', 'varchar_pattern_ops']),
+        ),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
@@ -0,0 +1,105 @@
+# Generated by Django 6.0 on 2026-10-18 16:26
+
+import re
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+BATCH_SIZE = 1000
+
+
+# Frozen copy of guests.whatsapp.normalize_wa, so later changes to it don't
+# change what this migration does
+def normalize_wa(value):
+    value = (value or '').strip()
+    digits = re.sub(r'\D', '', value)
+    if value.startswith('+'):
+        return digits
+    if digits.startswith('00'):
+        return digits[2:]
+    if digits.startswith('0'):
+        return settings.WA_COUNTRY_CODE + digits[1:]
+    return digits
+
+
+def normalize_numbers(apps, schema_editor):
+    """Rewrite every Guest.wa in canonical form, in keyset batches."""
+    Guest = apps.get_model('guests', 'Guest')
+
+    last_pk = None
+    while True:
+        guests = Guest.objects.order_by('pk')
+        if last_pk is not None:
+            guests = guests.filter(pk__gt=last_pk)
+        batch = list(guests.only('pk', 'wa')[:BATCH_SIZE])
+        if not batch:
+            break
+        last_pk = batch[-1].pk
+        changed = []
+        for guest in batch:
+            wa = normalize_wa(guest.wa)[:50]
+            if wa != guest.wa:
+                guest.wa = wa
+                changed.append(guest)
+        Guest.objects.bulk_update(changed, ['wa'], batch_size=BATCH_SIZE)
+
+
+def merge_duplicates(apps, schema_editor):
+    """
+    Keep one guest per (invitation, number): the one with the most progress
+    (RSVP, opened, sent, then most recently updated). It takes over the
+    others' progress and greetings, then the others are deleted.
+    """
+    Guest = apps.get_model('guests', 'Guest')
+    Greeting = apps.get_model('guests', 'Greeting')
+    InvitationStats = apps.get_model('guests', 'InvitationStats')
+
+    groups = (
+        Guest.objects.exclude(wa='')
+        .values('invitation_id', 'wa')
+        .annotate(count=Count('id'))
+        .filter(count__gt=1)
+        .order_by()
+    )
+    invitation_ids = set()
+    for group in list(groups):
+        guests = sorted(
+            Guest.objects.filter(invitation_id=group['invitation_id'], wa=group['wa']),
+            key=lambda guest: (
+                guest.rsvp is None, guest.view_at is None, not guest.is_sent, -guest.updated_at.timestamp()
+            )
+        )
+        kept, duplicates = guests[0], guests[1:]
+        views = [guest.view_at for guest in guests if guest.view_at is not None]
+        kept.view_at = min(views) if views else None
+        kept.is_sent = any(guest.is_sent for guest in guests)
+        kept.is_clicked_atm = any(guest.is_clicked_atm for guest in guests)
+        for field in ('email', 'rsvp', 'pax_request', 'pax_confirmed'):
+            if getattr(kept, field) in (None, ''):
+                setattr(kept, field, next((getattr(guest, field) for guest in duplicates if getattr(guest, field)), None))
+        kept.save()
+
+        Greeting.objects.filter(guest__in=duplicates).update(guest=kept)
+        Guest.objects.filter(pk__in=[guest.pk for guest in duplicates]).delete()
+        invitation_ids.add(group['invitation_id'])
+
+    # Recreated from a recount on first use (see guests/stats.py)
+    InvitationStats.objects.filter(invitation_id__in=invitation_ids).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('guests', '0010_guest_search'),
+        ('invitations', '0014_query_pattern_indexes'),
+    ]
+
+    operations = [
+        # Numbers and merges can't be restored: both steps are no-ops backwards
+        migrations.RunPython(normalize_numbers, migrations.RunPython.noop),
+        migrations.RunPython(merge_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='guest',
+            constraint=models.UniqueConstraint(condition=models.Q(('wa', ''), _negated=True), fields=('invitation', 'wa'), name='unique_guest_wa_per_invitation', opclasses=['uuid_ops', 'varchar_pattern_ops']),
+        ),
+    ]
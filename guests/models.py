@@ -1,5 +1,6 @@
 import uuid
-from django.db import models
+from django.db import models, router
+from django.utils import timezone
 from invitations.models import InvitationData
 
 class Guest(models.Model):
@@ -9,13 +10,14 @@ class Guest(models.Model):
     ]
     
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    invitation = models.ForeignKey(InvitationData, on_delete=models.CASCADE, related_name='guests')
+    # No single-column index: (invitation, slug) and (invitation, name) lead with it
+    invitation = models.ForeignKey(InvitationData, on_delete=models.CASCADE, related_name='guests', db_index=False)
     
     name = models.CharField(max_length=200)
-    slug = models.SlugField(db_index=True)
+    slug = models.SlugField(db_index=False) # Looked up per invitation, see unique_guest_slug_per_invitation
     type = models.CharField(max_length=20, choices=TYPE_CHOICES)
     
-    wa = models.CharField(max_length=50) # Whatsapp number
+    wa = models.CharField(max_length=50) # Whatsapp number, canonical digits (see guests/whatsapp.py)
     email = models.EmailField(null=True, blank=True)
     
     is_sent = models.BooleanField(default=False)
@@ -28,7 +30,101 @@ class Guest(models.Model):
     pax_request = models.PositiveIntegerField(null=True, blank=True)
     pax_confirmed = models.PositiveIntegerField(null=True, blank=True)
     
-    greetings = models.JSONField(default=list) # string[]
+    updated_at = models.DateTimeField(auto_now=True) # Version stamp for ETags
+
+    # Normalized name for ?search= (see guests/search.py), refreshed on save
+    search_name = models.CharField(max_length=200, blank=True, default='', editable=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['invitation', 'slug'], name='unique_guest_slug_per_invitation'),
+            # One guest per number; also the index of phone search
+            models.UniqueConstraint(fields=['invitation', 'wa'], condition=~models.Q(wa=''),
+                                    name='unique_guest_wa_per_invitation',
+                                    opclasses=['uuid_ops', 'varchar_pattern_ops']),
+        ]
+        indexes = [
+            # Keyset pagination order of GuestViewSet
+            models.Index(fields=['invitation', '-name', '-id'], name='guest_invitation_name_idx'),
+            # Prefix search; the pattern opclass (PostgreSQL only) lets LIKE 'x%' use it
+            models.Index(fields=['invitation', 'search_name'], name='guest_search_name_idx',
+                         opclasses=['uuid_ops', 'varchar_pattern_ops']),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.normalize_fields()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'name' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'search_name'}
+        super().save(*args, **kwargs)
+
+    def normalize_fields(self):
+        """Canonical wa and search_name (bulk_create callers must call this)."""
+        from .search import fold_text
+        from .whatsapp import normalize_wa
+        self.search_name = fold_text(self.name)[:200]
+        self.wa = normalize_wa(self.wa)[:50]
 
     def __str__(self):
         return f"{self.name} ({self.type})"
+
+
+
+class Greeting(models.Model):
+    """
+    A wish on an invitation's greetings wall. Append-only: rows are inserted,
+    never rewritten, and read newest first by keyset over greeting_wall_idx.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    invitation = models.ForeignKey(InvitationData, on_delete=models.CASCADE, related_name='greetings', db_index=False)
+    # Kept if the guest is removed; the name is copied so the wall needs no join
+    guest = models.ForeignKey(Guest, on_delete=models.SET_NULL, null=True, blank=True, related_name='greetings')
+    name = models.CharField(max_length=200)
+    message = models.TextField()
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # Wall order (newest first), keyset-paginated
+            models.Index(fields=['invitation', '-created_at', '-id'], name='greeting_wall_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name}: {self.message[:30]}"
+
+
+def delete_guests(guests):
+    """
+    Bulk delete a Guest queryset; returns the number of guests deleted. Django
+    emulates Greeting.guest's SET_NULL by loading every guest and deleting
+    them 100 per statement, so this nulls their greetings with one UPDATE and
+    deletes the guests with one DELETE instead. Guest has no other dependents
+    and no delete signal receivers, so nothing is skipped. Call inside a
+    transaction.
+    """
+    db = router.db_for_write(Guest)
+    guests = guests.using(db)
+    Greeting.objects.using(db).filter(guest__in=guests.values('pk')).update(guest=None)
+    return guests._raw_delete(db)
+
+
+class InvitationStats(models.Model):
+    """
+    Guest headcounts of an invitation, kept current by guests.stats.apply_deltas
+    on every guest write (relative F() updates) and checked against a full
+    recount by `manage.py rebuild_invitation_stats`. Pending, not sent and not
+    viewed are derived from `guests`.
+    """
+    invitation = models.OneToOneField(InvitationData, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    guests = models.IntegerField(default=0)
+    sent = models.IntegerField(default=0)
+    viewed = models.IntegerField(default=0)
+    gift_clicked = models.IntegerField(default=0)
+    attending = models.IntegerField(default=0)
+    declined = models.IntegerField(default=0)
+    pax_requested = models.IntegerField(default=0)
+    pax_confirmed = models.IntegerField(default=0) # Of attending guests only
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Stats of {self.invitation_id}"
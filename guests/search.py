@@ -0,0 +1,64 @@
+"""
+Server-side guest search (`GuestViewSet` `?search=`).
+
+Guest keeps a normalized copy of its name, refreshed on every save:
+`search_name` is case- and accent-folded ("Désy  Ayu" -> "desy ayu"); `wa`
+itself is stored canonically (see guests/whatsapp.py). A search term is
+normalized the same way and matched as a prefix over the (invitation,
+search_name) index and the unique (invitation, wa) index, as a range scan on
+SQLite and as LIKE 'term%' over varchar_pattern_ops on PostgreSQL. On
+PostgreSQL names also match by trigram similarity (pg_trgm GIN index, see
+migration 0010), which finds typos and words in the middle of a name.
+Terms with an '@' match the start of the email.
+"""
+import re
+import unicodedata
+from django.conf import settings
+from django.db import connections
+from django.db.models import Q
+from .whatsapp import normalize_wa
+
+PHONE_TERM = re.compile(r'\+?[\d\s().-]+')
+MIN_TRIGRAM_LENGTH = 3
+
+
+def fold_text(value):
+    """Lower-case, strip accents and collapse whitespace."""
+    value = unicodedata.normalize('NFKD', value or '')
+    value = ''.join(char for char in value if not unicodedata.combining(char))
+    return ' '.join(value.casefold().split())
+
+
+def _prefix(field, value, vendor):
+    if vendor == 'postgresql':
+        return Q(**{f'{field}__startswith': value})
+    # SQLite's LIKE can't use the index: scan the [value, next value) range instead
+    upper = value[:-1] + chr(ord(value[-1]) + 1)
+    return Q(**{f'{field}__gte': value, f'{field}__lt': upper})
+
+
+def search_guests(queryset, term):
+    term = (term or '').strip()
+    if not term:
+        return queryset
+    vendor = connections[queryset.db].vendor
+
+    if '@' in term:
+        return queryset.filter(email__istartswith=term)
+
+    if PHONE_TERM.fullmatch(term) and sum(char.isdigit() for char in term) >= 3:
+        number = normalize_wa(term)
+        condition = _prefix('wa', number, vendor)
+        if not term.startswith(('+', '0')):
+            # Typed without the country code, e.g. "812 345"
+            condition |= _prefix('wa', settings.WA_COUNTRY_CODE + number, vendor)
+        # Repeats the unique index's condition so the partial index applies
+        return queryset.filter(condition & ~Q(wa=''))
+
+    name = fold_text(term)
+    if not name:
+        return queryset.none()
+    condition = _prefix('search_name', name, vendor)
+    if vendor == 'postgresql' and len(name) >= MIN_TRIGRAM_LENGTH:
+        condition |= Q(search_name__trigram_similar=name)
+    return queryset.filter(condition)
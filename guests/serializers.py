@@ -1,9 +1,15 @@
 from rest_framework import serializers
 from .models import Guest
-from django.utils.text import slugify
-import uuid
+from core.slugs import save_with_unique_slug
+from core.serializers import SparseFieldsetMixin
+from .whatsapp import is_valid_wa, normalize_wa
+
+DUPLICATE_WA = 'A guest with this WhatsApp number already exists in this invitation.'
+
+class GuestSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    # Messages from the greetings wall, oldest first (prefetched by the viewset)
+    greetings = serializers.SerializerMethodField()
 
-class GuestSerializer(serializers.ModelSerializer):
     class Meta:
         model = Guest
         fields = [
@@ -16,12 +22,51 @@ class GuestSerializer(serializers.ModelSerializer):
             'slug': {'required': False, 'allow_blank': True},
             'invitation': {'required': True}
         }
+        # Slug stays optional: uniqueness per invitation is checked in validate()
+        # when a slug is given, and by the allocator when it is generated
+        validators = []
+
+    def get_greetings(self, obj):
+        return [greeting.message for greeting in obj.greetings.all()]
+
+    def validate_wa(self, value):
+        # Stored canonically, see guests/whatsapp.py
+        number = normalize_wa(value)
+        if not is_valid_wa(number):
+            raise serializers.ValidationError('Enter a valid WhatsApp number.')
+        return number
+
+    def validate(self, attrs):
+        slug = attrs.get('slug')
+        invitation = attrs.get('invitation', getattr(self.instance, 'invitation', None))
+        if slug and invitation:
+            clash = Guest.objects.filter(invitation=invitation, slug=slug)
+            if self.instance is not None:
+                clash = clash.exclude(pk=self.instance.pk)
+            if clash.exists():
+                raise serializers.ValidationError({'slug': 'This slug is already used in this invitation.'})
+        wa = attrs.get('wa', getattr(self.instance, 'wa', None))
+        if wa and invitation and ('wa' in attrs or 'invitation' in attrs):
+            clash = Guest.objects.filter(invitation=invitation, wa=wa)
+            if self.instance is not None:
+                clash = clash.exclude(pk=self.instance.pk)
+            if clash.exists():
+                raise serializers.ValidationError({'wa': DUPLICATE_WA})
+        return attrs
 
     def create(self, validated_data):
         # Auto-generate slug if missing
         if 'slug' not in validated_data or not validated_data['slug']:
-            base_slug = slugify(validated_data.get('name', 'guest'))
-            # Ensure unique slug by appending simplified UUID
-            validated_data['slug'] = f"{base_slug}-{uuid.uuid4().hex[:6]}"
+            # Random suffix keeps guest links unguessable; uniqueness per
+            # invitation is enforced by insert-and-retry on the unique index
+            guest = Guest(**validated_data)
+            return save_with_unique_slug(
+                guest,
+                validated_data.get('name', 'guest'),
+                fallback='guest',
+                scope=('invitation',),
+                always_suffix=True,
+                suffix_length=6
+            )
         
         return super().create(validated_data)
@@ -0,0 +1,158 @@
+"""
+Per-invitation guest statistics (InvitationStats).
+
+Every guest write path records what the write changed with a StatsDelta
+(remove the guest's old contribution, add the new one) and applies it after
+the guest rows are written, in the same transaction, as relative F()
+updates on the invitation's summary row. The stats endpoint therefore reads
+one row instead of aggregating the guest table. A missing row is created
+from a recount of the invitation, and `manage.py rebuild_invitation_stats`
+compares every row against a full recount (and repairs drift).
+
+RSVP is free text on Guest; it is classified case-insensitively, the same
+way in Python and in the recount query.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum, Value
+from django.db.models.functions import Coalesce, Lower, Trim
+from django.utils import timezone
+from rest_framework import serializers
+from .models import Guest, InvitationStats
+
+RSVP_ATTENDING = ('yes', 'y', 'ya', 'hadir', 'attend', 'attending', 'confirmed')
+RSVP_DECLINED = ('no', 'n', 'tidak', 'tidak hadir', 'absent', 'declined')
+
+# Guest columns a guest's contribution depends on
+SOURCE_FIELDS = ('invitation_id', 'is_sent', 'view_at', 'is_clicked_atm', 'rsvp', 'pax_request', 'pax_confirmed')
+COUNTERS = ('guests', 'sent', 'viewed', 'gift_clicked', 'attending', 'declined', 'pax_requested', 'pax_confirmed')
+
+
+def rsvp_status(rsvp):
+    value = (rsvp or '').strip(' ').lower()
+    if value in RSVP_ATTENDING:
+        return 'attending'
+    if value in RSVP_DECLINED:
+        return 'declined'
+    return 'pending'
+
+
+def snapshot(guest):
+    """The SOURCE_FIELDS of a Guest instance, as a dict."""
+    return {field: getattr(guest, field) for field in SOURCE_FIELDS}
+
+
+def contribution(values):
+    """What one guest (a snapshot/values() dict) adds to its invitation's counters."""
+    status = rsvp_status(values['rsvp'])
+    return {
+        'guests': 1,
+        'sent': int(bool(values['is_sent'])),
+        'viewed': int(values['view_at'] is not None),
+        'gift_clicked': int(bool(values['is_clicked_atm'])),
+        'attending': int(status == 'attending'),
+        'declined': int(status == 'declined'),
+        'pax_requested': values['pax_request'] or 0,
+        'pax_confirmed': (values['pax_confirmed'] or 0) if status == 'attending' else 0,
+    }
+
+
+class StatsDelta:
+    """Counter changes of a write, summed per invitation."""
+    def __init__(self):
+        self.totals = {} # invitation id -> {counter: delta}
+
+    def add(self, values, sign=1):
+        totals = self.totals.setdefault(values['invitation_id'], dict.fromkeys(COUNTERS, 0))
+        for counter, value in contribution(values).items():
+            totals[counter] += sign * value
+
+    def remove(self, values):
+        self.add(values, sign=-1)
+
+    def change(self, before, after):
+        self.remove(before)
+        self.add(after)
+
+    def apply(self):
+        """Call after the guest rows are written, inside the same transaction."""
+        apply_deltas(self.totals)
+
+
+def apply_deltas(totals):
+    now = timezone.now()
+    # Fixed order, so concurrent multi-invitation writes lock rows alike
+    for invitation_id in sorted(totals, key=str):
+        changes = {counter: F(counter) + delta for counter, delta in totals[invitation_id].items() if delta}
+        if not changes:
+            continue
+        if InvitationStats.objects.filter(invitation_id=invitation_id).update(updated_at=now, **changes):
+            continue
+        try:
+            # First write since the row existed: the recount already sees this
+            # transaction's guest rows, so the delta is not applied on top
+            with transaction.atomic():
+                InvitationStats.objects.create(invitation_id=invitation_id, **recount([invitation_id])[invitation_id])
+        except IntegrityError:
+            # Created concurrently from a recount that could not see our rows
+            InvitationStats.objects.filter(invitation_id=invitation_id).update(updated_at=now, **changes)
+
+
+def recount(invitation_ids):
+    """Full recount: {invitation id: {counter: value}} for each of `invitation_ids`."""
+    attending = Q(rsvp_status__in=RSVP_ATTENDING)
+    rows = (
+        Guest.objects
+        .filter(invitation_id__in=invitation_ids)
+        .alias(rsvp_status=Lower(Trim('rsvp')))
+        .values('invitation_id')
+        .annotate(
+            guests=Count('id'),
+            sent=Count('id', filter=Q(is_sent=True)),
+            viewed=Count('id', filter=Q(view_at__isnull=False)),
+            gift_clicked=Count('id', filter=Q(is_clicked_atm=True)),
+            attending=Count('id', filter=attending),
+            declined=Count('id', filter=Q(rsvp_status__in=RSVP_DECLINED)),
+            pax_requested=Coalesce(Sum('pax_request'), Value(0)),
+            pax_confirmed=Coalesce(Sum('pax_confirmed', filter=attending), Value(0)),
+        )
+        .order_by()
+    )
+    counts = {invitation_id: dict.fromkeys(COUNTERS, 0) for invitation_id in invitation_ids}
+    for row in rows:
+        counts[row.pop('invitation_id')] = row
+    return counts
+
+
+def stats_for(invitation_id):
+    stats = InvitationStats.objects.filter(invitation_id=invitation_id).first()
+    if stats is None:
+        stats, _ = InvitationStats.objects.get_or_create(
+            invitation_id=invitation_id, defaults=recount([invitation_id])[invitation_id]
+        )
+    return stats
+
+
+class InvitationStatsSerializer(serializers.ModelSerializer):
+    notSent = serializers.SerializerMethodField()
+    notViewed = serializers.SerializerMethodField()
+    pending = serializers.SerializerMethodField()
+    giftClicked = serializers.IntegerField(source='gift_clicked')
+    paxRequested = serializers.IntegerField(source='pax_requested')
+    paxConfirmed = serializers.IntegerField(source='pax_confirmed')
+    updatedAt = serializers.DateTimeField(source='updated_at')
+
+    class Meta:
+        model = InvitationStats
+        fields = [
+            'guests', 'sent', 'notSent', 'viewed', 'notViewed', 'giftClicked',
+            'attending', 'declined', 'pending', 'paxRequested', 'paxConfirmed', 'updatedAt'
+        ]
+
+    def get_notSent(self, obj):
+        return obj.guests - obj.sent
+
+    def get_notViewed(self, obj):
+        return obj.guests - obj.viewed
+
+    def get_pending(self, obj):
+        return obj.guests - obj.attending - obj.declined
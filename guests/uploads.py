@@ -0,0 +1,247 @@
+"""
+Streaming guest-list upload (CSV, XLSX) on top of GuestImporter.
+
+The upload is spooled to a temporary file, then parsed row by row in a
+generator pipeline and imported in fixed-size batches by a background
+thread, so memory stays flat regardless of file size. Progress is kept in
+GUEST_IMPORT_CACHE under the job id for the UI to poll from any worker, so
+that cache must be shared (the view rejects uploads otherwise).
+
+The thread records a heartbeat with every batch. A job whose heartbeat is
+older than GUEST_IMPORT_STALE_AFTER lost its worker (recycled or killed
+mid-import) and is reported as failed; the spooled files such jobs leave
+behind are removed by the status poll and by the next upload.
+"""
+import csv
+import io
+import os
+import tempfile
+import threading
+import time
+import uuid
+from itertools import islice
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from core.caches import is_process_local
+
+BATCH_SIZE = 500
+MAX_REPORTED_ERRORS = 100
+PROGRESS_TIMEOUT = 60 * 60 * 24
+SPOOL_DIR = os.path.join(tempfile.gettempdir(), 'saturasa-guest-imports')
+ACTIVE_STATUSES = ('queued', 'running')
+PRIVATE_KEYS = ('user_id', 'heartbeat')
+
+# Spreadsheet header -> GuestSerializer field
+COLUMN_ALIASES = {
+    'name': 'name', 'nama': 'name',
+    'type': 'type', 'tipe': 'type',
+    'wa': 'wa', 'whatsapp': 'wa', 'phone': 'wa', 'no wa': 'wa',
+    'email': 'email',
+    'slug': 'slug',
+    'pax': 'pax_request', 'pax_request': 'pax_request',
+}
+
+SUPPORTED_FORMATS = ('csv', 'xlsx')
+
+
+def file_format(filename):
+    extension = os.path.splitext(filename or '')[1].lower().lstrip('.')
+    return extension if extension in SUPPORTED_FORMATS else None
+
+
+def _normalize_header(header):
+    return [COLUMN_ALIASES.get(str(column or '').strip().lower()) for column in header]
+
+
+def _cell(value):
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        # Spreadsheets store phone numbers as floats
+        return str(int(value))
+    return str(value).strip()
+
+
+def _rows_from_table(table):
+    """Turn an iterator of raw rows (header first) into (line number, field dict)."""
+    header = next(table, None)
+    if header is None:
+        return
+    columns = _normalize_header(header)
+    for line, raw in enumerate(table, start=2):
+        row = {
+            column: _cell(value)
+            for column, value in zip(columns, raw)
+            if column is not None
+        }
+        if not any(row.values()):
+            continue  # Skip blank lines
+        if not row.get('type'):
+            row['type'] = 'individual'
+        if not row.get('email'):
+            row.pop('email', None)
+        if not row.get('pax_request'):
+            row.pop('pax_request', None)
+        yield line, row
+
+
+def iter_csv_rows(path):
+    with open(path, 'rb') as raw:
+        text = io.TextIOWrapper(raw, encoding='utf-8-sig', newline='')
+        sample = text.read(4096)
+        text.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+        except csv.Error:
+            dialect = csv.excel
+        yield from _rows_from_table(csv.reader(text, dialect))
+
+
+def iter_xlsx_rows(path):
+    from openpyxl import load_workbook  # Optional dependency, checked by the view
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        yield from _rows_from_table(workbook.active.iter_rows(values_only=True))
+    finally:
+        workbook.close()
+
+
+def xlsx_supported():
+    try:
+        import openpyxl  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _spool_path(job_id, fmt):
+    return os.path.join(SPOOL_DIR, f'{job_id}.{fmt}')
+
+
+def spool_upload(upload, job_id, fmt):
+    """Copy an UploadedFile to the job's spool file chunk by chunk; returns its path."""
+    os.makedirs(SPOOL_DIR, exist_ok=True)
+    path = _spool_path(job_id, fmt)
+    with open(path, 'wb') as target:
+        for chunk in upload.chunks():
+            target.write(chunk)
+    return path
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def remove_stale_spools():
+    """Drop spool files of jobs whose worker died; live jobs touch theirs every batch."""
+    cutoff = time.time() - settings.GUEST_IMPORT_STALE_AFTER
+    try:
+        entries = list(os.scandir(SPOOL_DIR))
+    except FileNotFoundError:
+        return
+    for entry in entries:
+        try:
+            stale = entry.stat().st_mtime < cutoff
+        except FileNotFoundError:
+            continue
+        if stale:
+            _remove(entry.path)
+
+
+def progress_shared():
+    return not is_process_local(settings.GUEST_IMPORT_CACHE)
+
+
+def _progress_key(job_id):
+    return f'guest-import:{job_id}'
+
+
+def get_progress(job_id):
+    cache = caches[settings.GUEST_IMPORT_CACHE]
+    progress = cache.get(_progress_key(job_id))
+    if (
+        progress and progress['status'] in ACTIVE_STATUSES
+        and time.time() - progress['heartbeat'] > settings.GUEST_IMPORT_STALE_AFTER
+    ):
+        # The worker running the import went away without reporting back
+        progress['status'] = 'failed'
+        progress['detail'] = (
+            f"Import stopped after {progress['processed']} rows: the worker running it stopped. "
+            'Upload the file again to import the remaining rows.'
+        )
+        cache.set(_progress_key(job_id), progress, PROGRESS_TIMEOUT)
+        for fmt in SUPPORTED_FORMATS:
+            _remove(_spool_path(job_id, fmt))
+    return progress
+
+
+def _save_progress(job_id, progress):
+    progress['heartbeat'] = time.time()
+    caches[settings.GUEST_IMPORT_CACHE].set(_progress_key(job_id), progress, PROGRESS_TIMEOUT)
+
+
+def run_import(job_id, importer, path, fmt, invitation_id):
+    progress = get_progress(job_id)
+    progress['status'] = 'running'
+    _save_progress(job_id, progress)
+
+    rows = iter_xlsx_rows(path) if fmt == 'xlsx' else iter_csv_rows(path)
+    line = 1
+    try:
+        for batch in batched(rows, BATCH_SIZE):
+            lines = [line for line, _ in batch]
+            for _, row in batch:
+                row['invitation'] = invitation_id
+            created, errors = importer.import_rows([row for _, row in batch])
+            line = lines[-1]
+
+            progress['processed'] += len(batch)
+            progress['created'] += len(created)
+            progress['failed'] += len(errors)
+            room = MAX_REPORTED_ERRORS - len(progress['errors'])
+            progress['errors'].extend(
+                {'line': lines[error['row']], 'errors': error['errors']}
+                for error in errors[:max(room, 0)]
+            )
+            _save_progress(job_id, progress)
+            os.utime(path) # Heartbeat for remove_stale_spools
+        progress['status'] = 'done'
+    except Exception as exc:
+        progress['status'] = 'failed'
+        progress['detail'] = f'Import stopped after line {line}: {exc}'
+    finally:
+        _save_progress(job_id, progress)
+        _remove(path)
+        connection.close()  # Thread-local connection, not reused by Django
+
+
+def start_import(importer, upload, fmt, invitation_id):
+    remove_stale_spools()
+    job_id = uuid.uuid4().hex
+    _save_progress(job_id, {
+        'job_id': job_id,
+        'user_id': importer.user.pk,
+        'status': 'queued',
+        'processed': 0,
+        'created': 0,
+        'failed': 0,
+        'errors': [],
+    })
+    path = spool_upload(upload, job_id, fmt)
+    threading.Thread(
+        target=run_import,
+        args=(job_id, importer, path, fmt, str(invitation_id)),
+        daemon=True,
+    ).start()
+    return job_id
@@ -1,10 +1,13 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import GuestViewSet
+from .views import GuestViewSet, PublicGuestInteractionView, PublicGreetingView
 
 router = DefaultRouter()
 router.register(r'', GuestViewSet, basename='guest')
 
 urlpatterns = [
+    path('public/<slug:slug>/greetings/', PublicGreetingView.as_view(), name='public-greetings'),
+    path('public/<slug:slug>/<slug:guest_slug>/greetings/', PublicGreetingView.as_view(), name='public-guest-greeting'),
+    path('public/<slug:slug>/<slug:guest_slug>/<slug:event>/', PublicGuestInteractionView.as_view(), name='public-guest-event'),
     path('', include(router.urls)),
 ]
@@ -1,28 +1,68 @@
-from rest_framework import viewsets, permissions, status
+import uuid
+from rest_framework import viewsets, views, permissions, status, exceptions
 from rest_framework.response import Response
 from rest_framework.decorators import action
-from django.db.models import Q
-from .models import Guest
+from rest_framework.utils.urls import replace_query_param
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max, Prefetch, prefetch_related_objects
+from django.core.exceptions import ValidationError
+from .models import Guest, Greeting, delete_guests
 from .serializers import GuestSerializer
+from .importer import GuestImporter
+from . import uploads, interactions, greetings, whatsapp
+from .exports import EXPORT_FORMATS, stream_guests
+from .stats import SOURCE_FIELDS, StatsDelta, snapshot
+from .search import search_guests
 from invitations.models import InvitationData, InvitationMember
+from invitations.permissions import get_role_resolver
+from invitations.render import invalidate_guests, get_invitation_entry, get_guest_entry
+from core.conditional import ConditionalGetMixin
+from core.db import replica_reads
+from core.pagination import KeysetPagination
 
-class GuestViewSet(viewsets.ModelViewSet):
+class GuestViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = GuestSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-name', '-id')
 
     def get_queryset(self):
         user = self.request.user
-        # Allow if user is Owner OR Member
-        queryset = Guest.objects.filter(
-            Q(invitation__user=user) | Q(invitation__members__user=user)
-        ).distinct()
+        # Allow if user is Owner OR Member (owners have a membership row too)
+        from django.utils import timezone
+        invitation_ids = InvitationMember.invitation_ids(user).exclude(
+            # Guests of expired invitations stay hidden until the reaper purges them
+            invitation__expires_at__lt=timezone.now()
+        )
+        queryset = Guest.objects.filter(invitation_id__in=invitation_ids)
         
         # Filter by invitation ID if provided
         invitation_id = self.request.query_params.get('invitation_id')
         if invitation_id:
             queryset = queryset.filter(invitation_id=invitation_id)
+
+        # ?search= name, WhatsApp number or email prefix (see guests/search.py)
+        if self.action == 'list':
+            queryset = search_guests(queryset, self.request.query_params.get('search'))
+            
+        if self.action in ('list', 'retrieve', 'update', 'partial_update'):
+            fields = self.get_serializer_class().requested_fields(self.request)
+            if fields is None or 'greetings' in fields:
+                queryset = queryset.prefetch_related(
+                    Prefetch('greetings', queryset=Greeting.objects.order_by('created_at', 'id'))
+                )
             
-        return queryset.order_by('-name')
+        return queryset.order_by(*self.keyset_ordering)
+
+    def get_version_aggregates(self):
+        # New wishes don't touch the guest row. Their join repeats each guest
+        # once per greeting, hence the distinct count
+        return {
+            **super().get_version_aggregates(),
+            'count': Count('pk', distinct=True),
+            'greeting': Max('greetings__created_at'),
+        }
 
     def perform_create(self, serializer):
         # Ensure the invitation belongs to the user OR user is an editor/owner member
@@ -32,23 +72,42 @@ class GuestViewSet(viewsets.ModelViewSet):
              serializer.save()
              return
 
-        # Check Owner
-        is_owner = invitation.user == self.request.user
-        # Check Member Role
-        is_editor = invitation.members.filter(
-            user=self.request.user, 
-            role__in=['owner', 'editor']
-        ).exists()
+        if not get_role_resolver(self.request).can_edit(invitation.pk):
+            raise exceptions.PermissionDenied("You do not have permission to add guests to this invitation.")
+        with transaction.atomic():
+            guest = serializer.save()
+            stats = StatsDelta()
+            stats.add(snapshot(guest))
+            stats.apply()
+
+    def perform_update(self, serializer):
+        guest = serializer.instance
+        previous = (guest.id, guest.invitation_id, guest.slug)
+        before = snapshot(guest)
+        with transaction.atomic():
+            serializer.save()
+            stats = StatsDelta()
+            stats.change(before, snapshot(guest))
+            stats.apply()
+        # Drop the public render cache for both the old and the new slug
+        invalidate_guests([previous, (guest.id, guest.invitation_id, guest.slug)])
 
-        if not (is_owner or is_editor):
-            raise permissions.PermissionDenied("You do not have permission to add guests to this invitation.")
-        serializer.save()
+    def perform_destroy(self, instance):
+        target = (instance.id, instance.invitation_id, instance.slug)
+        before = snapshot(instance)
+        with transaction.atomic():
+            instance.delete()
+            stats = StatsDelta()
+            stats.remove(before)
+            stats.apply()
+        invalidate_guests([target])
 
     @action(detail=False, methods=['post'])
     def bulk_create_guests(self, request):
         """
         Create multiple guests at once.
-        Expects a list of guest objects in the body.
+        Expects a list of guest objects in the body. Valid rows are created,
+        invalid or forbidden rows come back in `errors` with their index.
         """
         # If the data is a list, we treat it as bulk create
         data = request.data
@@ -57,37 +116,153 @@ class GuestViewSet(viewsets.ModelViewSet):
                 {"detail": "Expected a list of guests for bulk creation."}, 
                 status=status.HTTP_400_BAD_REQUEST
             )
-            
-        # Validate all items
-        serializer = self.get_serializer(data=data, many=True)
-        serializer.is_valid(raise_exception=True)
-        
-        # Check ownership/permission for all items
-        for item in serializer.validated_data:
-            invitation = item.get('invitation')
-            
-            if not invitation:
-                continue
-
-            # Check Owner
-            is_owner = invitation.user == request.user
-            # Check Member Role
-            is_editor = invitation.members.filter(
-                user=request.user, 
-                role__in=['owner', 'editor']
-            ).exists()
-            
-            if not (is_owner or is_editor):
-                return Response(
-                    {"detail": "You do not have permission to add guests to one or more invitations."}, 
-                    status=status.HTTP_403_FORBIDDEN
-                )
 
-        self.perform_bulk_create(serializer)
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+        created, errors = GuestImporter(request.user, get_role_resolver(request)).import_rows(data)
+        prefetch_related_objects(created, 'greetings')
+
+        return Response(
+            {
+                "created": GuestSerializer(created, many=True).data,
+                "errors": errors
+            },
+            status=status.HTTP_201_CREATED if created or not errors else status.HTTP_400_BAD_REQUEST
+        )
+
+    @action(detail=False, methods=['post'], url_path='import')
+    def import_file(self, request):
+        """
+        Import a guest list spreadsheet (CSV or XLSX) for `invitation_id`.
+        The file is processed in batches in the background; poll the returned
+        `status_url` for progress and per-line errors.
+        """
+        upload = request.FILES.get('file')
+        invitation_id = request.data.get('invitation_id')
+        if not upload or not invitation_id:
+            return Response(
+                {"detail": "'file' and 'invitation_id' are required."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not uploads.progress_shared():
+            return Response(
+                {"detail": "Guest imports are not available on this server (GUEST_IMPORT_CACHE is not shared between workers)."},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+
+        fmt = uploads.file_format(upload.name)
+        if fmt is None:
+            return Response(
+                {"detail": "Unsupported file type, expected .csv or .xlsx."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if fmt == 'xlsx' and not uploads.xlsx_supported():
+            return Response(
+                {"detail": "XLSX import is not available on this server, please upload a CSV."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-    def perform_bulk_create(self, serializer):
-        serializer.save()
+        importer = GuestImporter(request.user, get_role_resolver(request))
+        try:
+            allowed = importer.editable_invitations([invitation_id])
+        except (TypeError, ValueError, ValidationError):
+            allowed = set()
+        if not allowed:
+            return Response(
+                {"detail": "You do not have permission to add guests to this invitation."},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        job_id = uploads.start_import(importer, upload, fmt, allowed.pop())
+        return Response(
+            {
+                "job_id": job_id,
+                "status_url": request.build_absolute_uri(f"{request.path}{job_id}/")
+            },
+            status=status.HTTP_202_ACCEPTED
+        )
+
+    @action(detail=False, methods=['get'], url_path=r'import/(?P<job_id>[0-9a-f]{32})')
+    def import_status(self, request, job_id=None):
+        progress = uploads.get_progress(job_id)
+        if not progress or progress['user_id'] != request.user.pk:
+            return Response({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
+        return Response({key: value for key, value in progress.items() if key not in uploads.PRIVATE_KEYS})
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Stream every guest of `invitation_id` as CSV or NDJSON
+        (`export_format`, default csv) for printing and broadcast tools.
+        """
+        from django.utils import timezone
+        invitation_id = request.query_params.get('invitation_id')
+        export_format = request.query_params.get('export_format', 'csv')
+        if not invitation_id or export_format not in EXPORT_FORMATS:
+            return Response(
+                {"detail": "'invitation_id' is required and 'export_format' must be csv or ndjson."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # Read-only bulk read: served by a replica when one is configured
+        with replica_reads():
+            try:
+                invitation = InvitationData.objects.filter(
+                    id__in=InvitationMember.invitation_ids(request.user),
+                    pk=invitation_id
+                ).exclude(expires_at__lt=timezone.now()).only('id', 'slug').first()
+            except (ValueError, ValidationError):
+                invitation = None
+            if invitation is None:
+                return Response({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
+
+            return stream_guests(invitation, export_format)
+
+    @action(detail=False, methods=['post'], url_path='send-links')
+    def send_links(self, request):
+        """
+        Stream a personalized wa.me link (NDJSON, one guest per line) for the
+        guests of `invitation_id` that have a number, and mark them as sent.
+        Optional: `guest_ids` (list), `only_unsent` (bool) and `message` with
+        {name} and {link} placeholders.
+        """
+        from django.utils import timezone
+        invitation_id = request.data.get('invitation_id')
+        guest_ids = request.data.get('guest_ids')
+        message = request.data.get('message') or whatsapp.DEFAULT_MESSAGE
+        if not invitation_id or (guest_ids is not None and not isinstance(guest_ids, list)):
+            return Response(
+                {"detail": "'invitation_id' is required and 'guest_ids' must be a list."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            # Checked up front: the ids are only used once the response streams
+            guest_ids = None if guest_ids is None else [uuid.UUID(str(guest_id)) for guest_id in guest_ids]
+        except ValueError:
+            return Response({"detail": "'guest_ids' must be guest ids."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            whatsapp.render_message(str(message), name='', link='')
+        except (KeyError, ValueError, IndexError):
+            return Response(
+                {"detail": "'message' may only use the {name} and {link} placeholders."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            invitation = InvitationData.objects.filter(
+                id__in=InvitationMember.invitation_ids(request.user),
+                pk=invitation_id
+            ).exclude(expires_at__lt=timezone.now()).only('id', 'slug').first()
+        except (ValueError, ValidationError):
+            invitation = None
+        if invitation is None:
+            return Response({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
+        # Marks guests as sent: owners and editors only
+        if not get_role_resolver(request).can_edit(invitation.pk):
+            raise exceptions.PermissionDenied("You do not have permission to send this invitation.")
+
+        return whatsapp.stream_send_links(
+            invitation, str(message), guest_ids=guest_ids,
+            only_unsent=request.data.get('only_unsent') in (True, 'true', '1')
+        )
 
     @action(detail=False, methods=['post'])
     def bulk_delete_guests(self, request):
@@ -103,7 +278,90 @@ class GuestViewSet(viewsets.ModelViewSet):
             )
             
         # Filter guests to ensure they belong to user
-        qs = self.get_queryset().filter(id__in=guest_ids)
-        deleted_count, _ = qs.delete()
+        rows = list(self.get_queryset().filter(id__in=guest_ids).values('id', 'slug', *SOURCE_FIELDS))
+        stats = StatsDelta()
+        for row in rows:
+            stats.remove(row)
+        with transaction.atomic():
+            deleted_count = delete_guests(Guest.objects.filter(id__in=[row['id'] for row in rows]))
+            stats.apply()
+        invalidate_guests([(row['id'], row['invitation_id'], row['slug']) for row in rows])
         
         return Response({"deleted": deleted_count}, status=status.HTTP_200_OK)
+
+
+class PublicGuestInteractionView(views.APIView):
+    """
+    Guest-facing events for a personalized invitation link: `opened`,
+    `gift` (digital gift clicked) and `rsvp` (`rsvp`, optional `pax`).
+    The guest is resolved from the render cache and the event is buffered
+    (see guests/interactions.py), so this never waits on a database write.
+    """
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+
+    def post(self, request, slug, guest_slug, event):
+        if event not in interactions.EVENTS:
+            return Response({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            data = request.data if hasattr(request.data, 'get') else {}
+            changes = interactions.event_changes(event, data)
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        invitation = get_invitation_entry(slug)
+        guest = get_guest_entry(invitation['id'], guest_slug) if invitation else None
+        if guest is None:
+            return Response({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        interactions.record(guest['id'], changes)
+        return Response({"status": "accepted"}, status=status.HTTP_202_ACCEPTED)
+
+
+class PublicGreetingView(views.APIView):
+    """
+    Greetings wall of an invitation. GET lists wishes newest first
+    (cursor-paginated, first page cached); POST on a guest link
+    (`/<guest_slug>/greetings/`) adds the guest's wish.
+    """
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+    keyset_ordering = ('-created_at', '-id')
+
+    def get(self, request, slug):
+        invitation = get_invitation_entry(slug)
+        if invitation is None:
+            return Response({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        paginator = greetings.GreetingPagination()
+        params = request.query_params
+        if paginator.cursor_query_param in params or paginator.page_size_query_param in params:
+            rows = paginator.paginate_queryset(
+                Greeting.objects.filter(invitation_id=invitation['id']), request, view=self
+            )
+            return paginator.get_paginated_response(greetings.GreetingSerializer(rows, many=True).data)
+
+        page = greetings.latest_page(invitation['id'], paginator, request, self)
+        next_link = None
+        if page['cursor']:
+            next_link = replace_query_param(
+                request.build_absolute_uri(), paginator.cursor_query_param, page['cursor']
+            )
+        return Response({"next": next_link, "results": page['results']})
+
+    def post(self, request, slug, guest_slug=None):
+        invitation = get_invitation_entry(slug)
+        guest = get_guest_entry(invitation['id'], guest_slug) if invitation and guest_slug else None
+        if guest is None:
+            return Response({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        data = request.data if hasattr(request.data, 'get') else {}
+        message = str(data.get('message') or '').strip()
+        if not message or len(message) > settings.GREETING_MAX_LENGTH:
+            return Response(
+                {"detail": f"'message' is required (max {settings.GREETING_MAX_LENGTH} characters)."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        greeting = greetings.add_greeting(invitation['id'], guest['id'], guest['data']['name'], message)
+        return Response(greetings.GreetingSerializer(greeting).data, status=status.HTTP_201_CREATED)
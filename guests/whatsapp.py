@@ -0,0 +1,113 @@
+"""
+WhatsApp numbers and personalized send links.
+
+Guest.wa is stored in one canonical form, E.164 digits without the '+'
+("0812-345 678" -> "62812345678"), normalized on every save, so it is also
+what `wa.me` links, search prefixes and the per-invitation uniqueness
+constraint (unique_guest_wa_per_invitation) work on.
+
+`stream_send_links` streams one NDJSON line per guest with the guest's wa.me
+link and marks the guests as sent batch by batch, each batch with one UPDATE
+(and its InvitationStats delta) before its lines go out.
+"""
+import re
+from urllib.parse import quote
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Q
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from .models import Guest
+from .stats import apply_deltas
+
+MIN_DIGITS = 8
+MAX_DIGITS = 15 # E.164
+BATCH_SIZE = 1000
+
+DEFAULT_MESSAGE = (
+    'Kepada Yth. {name},\n\n'
+    'Tanpa mengurangi rasa hormat, kami mengundang Anda untuk hadir di acara kami. '
+    'Info lengkap acara dapat dilihat di:\n{link}\n\nTerima kasih.'
+)
+
+
+def normalize_wa(value):
+    """
+    Canonical digits of a WhatsApp number: '+62 812..' and '0062 812..' keep
+    their country code, a national '0812..' gets WA_COUNTRY_CODE.
+    """
+    value = (value or '').strip()
+    digits = re.sub(r'\D', '', value)
+    if value.startswith('+'):
+        return digits
+    if digits.startswith('00'):
+        return digits[2:]
+    if digits.startswith('0'):
+        return settings.WA_COUNTRY_CODE + digits[1:]
+    return digits
+
+
+def is_valid_wa(number):
+    return MIN_DIGITS <= len(number) <= MAX_DIGITS and not number.startswith('0')
+
+
+def guest_link(invitation_slug, guest_slug):
+    return settings.INVITATION_LINK_FORMAT.format(slug=invitation_slug, guest_slug=guest_slug)
+
+
+def render_message(message, name, link):
+    """Fill {name} and {link}; raises KeyError/ValueError/IndexError on other placeholders."""
+    return message.format(name=name, link=link)
+
+
+def send_url(number, text):
+    return f"https://wa.me/{number}?text={quote(text, safe='')}"
+
+
+def iter_send_links(invitation, message, guest_ids=None, only_unsent=False, batch_size=BATCH_SIZE):
+    queryset = Guest.objects.filter(invitation_id=invitation.pk).exclude(wa='')
+    if guest_ids is not None:
+        queryset = queryset.filter(pk__in=guest_ids)
+    if only_unsent:
+        queryset = queryset.filter(is_sent=False)
+    queryset = queryset.order_by('name', 'id').values('id', 'name', 'slug', 'wa')
+
+    last = None
+    while True:
+        # Keyset batches: rows marked sent meanwhile don't shift the next page
+        batch = queryset
+        if last is not None:
+            batch = batch.filter(Q(name__gt=last['name']) | Q(name=last['name'], id__gt=last['id']))
+        rows = list(batch[:batch_size])
+        if not rows:
+            break
+        last = rows[-1]
+
+        with transaction.atomic():
+            sent = Guest.objects.filter(pk__in=[row['id'] for row in rows], is_sent=False).update(
+                is_sent=True, updated_at=timezone.now()
+            )
+            if sent:
+                apply_deltas({invitation.pk: {'sent': sent}})
+
+        for row in rows:
+            link = guest_link(invitation.slug, row['slug'])
+            yield {
+                'id': row['id'],
+                'name': row['name'],
+                'wa': row['wa'],
+                'link': link,
+                'url': send_url(row['wa'], render_message(message, row['name'], link)),
+            }
+
+
+def stream_send_links(invitation, message, guest_ids=None, only_unsent=False):
+    encoder = DjangoJSONEncoder(separators=(',', ':'))
+    lines = (
+        encoder.encode(row) + '\n'
+        for row in iter_send_links(invitation, message, guest_ids, only_unsent)
+    )
+    response = StreamingHttpResponse(lines, content_type='application/x-ndjson')
+    response['Content-Disposition'] = f'attachment; filename="send-links-{invitation.slug}.ndjson"'
+    return response
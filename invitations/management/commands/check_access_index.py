@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from invitations.models import InvitationData, InvitationMember
+
+
+class Command(BaseCommand):
+    help = 'Check that every invitation owner has an owner membership (the access index) and repair it'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report, do not repair')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        owner_membership = InvitationMember.objects.filter(
+            invitation=OuterRef('pk'),
+            user=OuterRef('user')
+        )
+
+        # 1. Owners without any membership row
+        missing = list(
+            InvitationData.objects.filter(~Exists(owner_membership)).values_list('id', 'user_id')
+        )
+        # 2. Owners whose membership row carries a lower role
+        wrong_role = list(
+            InvitationMember.objects.filter(
+                Exists(InvitationData.objects.filter(pk=OuterRef('invitation_id'), user_id=OuterRef('user_id')))
+            ).exclude(role='owner').values_list('id', 'invitation_id')
+        )
+
+        self.stdout.write(f'Owners missing from the access index: {len(missing)}')
+        self.stdout.write(f'Owner memberships with a non-owner role: {len(wrong_role)}')
+        if options['dry_run'] or not (missing or wrong_role):
+            return
+
+        with transaction.atomic():
+            InvitationMember.objects.bulk_create(
+                [
+                    InvitationMember(invitation_id=invitation_id, user_id=user_id, role='owner')
+                    for invitation_id, user_id in missing
+                ],
+                batch_size=batch_size,
+                ignore_conflicts=True
+            )
+            InvitationMember.objects.filter(id__in=[pk for pk, _ in wrong_role]).update(role='owner')
+            InvitationData.touch(*{invitation_id for invitation_id, _ in missing + wrong_role})
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Repaired {len(missing)} missing and {len(wrong_role)} mis-roled owner memberships.'
+        ))
@@ -0,0 +1,96 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from guests.models import Greeting, Guest, delete_guests
+from invitations.models import InvitationData, PurgeCheckpoint
+
+CHECKPOINT_NAME = 'expired_invitations'
+
+class Command(BaseCommand):
+    help = 'Delete expired invitations (and their cascades) in bounded batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Invitations deleted per transaction (default: 500)')
+        parser.add_argument('--max-batches', type=int, default=0,
+                            help='Stop after this many batches per run (default: no limit)')
+        parser.add_argument('--full', action='store_true',
+                            help='Ignore the high-water mark and rescan every expired invitation')
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep running, purging every --interval seconds')
+        parser.add_argument('--interval', type=int, default=300,
+                            help='Seconds between runs in --loop mode (default: 300)')
+
+    def handle(self, *args, **options):
+        while True:
+            self.purge(options)
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+    def purge(self, options):
+        batch_size = options['batch_size']
+        max_batches = options['max_batches']
+        now = timezone.now()
+
+        checkpoint, _ = PurgeCheckpoint.objects.get_or_create(name=CHECKPOINT_NAME)
+        watermark = None if options['full'] else checkpoint.high_water_mark
+
+        started = time.monotonic()
+        batches = 0
+        invitations = 0
+        rows = 0
+        per_model = {}
+
+        while not max_batches or batches < max_batches:
+            # Keyset scan over the expires_at index, starting at the high-water
+            # mark so a run never revisits rows an earlier run already purged
+            expired = InvitationData.objects.filter(expires_at__lt=now)
+            if watermark is not None:
+                expired = expired.filter(expires_at__gte=watermark)
+            chunk = list(
+                expired.order_by('expires_at', 'id').values_list('id', 'expires_at')[:batch_size]
+            )
+            if not chunk:
+                break
+
+            with transaction.atomic():
+                # Re-check expiry: an invitation paid for meanwhile is kept
+                ids = list(
+                    InvitationData.objects.select_for_update().filter(
+                        id__in=[pk for pk, _ in chunk],
+                        expires_at__lt=now
+                    ).values_list('id', flat=True)
+                )
+                # Greetings and guests first, one statement each: the collector
+                # would load every guest (see guests.models.delete_guests)
+                greetings, _ = Greeting.objects.filter(invitation_id__in=ids).delete()
+                guests = delete_guests(Guest.objects.filter(invitation_id__in=ids))
+                deleted, counts = InvitationData.objects.filter(id__in=ids).delete()
+                deleted += greetings + guests
+                for model, count in ((Greeting, greetings), (Guest, guests)):
+                    if count:
+                        counts[model._meta.label] = count
+                watermark = chunk[-1][1]
+                checkpoint.high_water_mark = watermark
+                checkpoint.save(update_fields=['high_water_mark', 'updated_at'])
+
+            batches += 1
+            rows += deleted
+            invitations += counts.get(InvitationData._meta.label, 0)
+            for label, count in counts.items():
+                per_model[label] = per_model.get(label, 0) + count
+
+            if len(chunk) < batch_size:
+                break
+
+        elapsed = time.monotonic() - started
+        rate = invitations / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'Purged {invitations} expired invitations ({rows} rows) in {batches} batches, '
+            f'{elapsed:.2f}s ({rate:.1f} invitations/s)'
+        ))
+        for label, count in sorted(per_model.items()):
+            self.stdout.write(f'  {label}: {count}')
+        self.stdout.write(f'High-water mark: {checkpoint.high_water_mark}')
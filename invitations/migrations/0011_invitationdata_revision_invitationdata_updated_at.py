@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-18 16:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invitations', '0010_purgecheckpoint_invitationdata_expires_at_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='invitationdata',
+            name='revision',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='invitationdata',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 6.0 on 2026-10-18 16:04
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_alter_song_path'),
+        ('invitations', '0011_invitationdata_revision_invitationdata_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='invitationdata',
+            index=models.Index(fields=['-created_at', '-id'], name='invitation_created_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 6.0 on 2026-10-18 16:14
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_usage_counters'),
+        ('invitations', '0013_member_user_access_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='invitationticket',
+            index=models.Index(condition=models.Q(('is_claimed', False)), fields=['token_hash', 'expires_at'], name='ticket_unclaimed_token_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='invitationticket',
+            index=models.Index(condition=models.Q(('is_claimed', False)), fields=['email', 'expires_at'], name='ticket_unclaimed_email_idx'),
+        ),
+    ]
@@ -12,7 +12,9 @@ class InvitationData(models.Model):
     song = models.ForeignKey(Song, on_delete=models.SET_NULL, null=True, blank=True, related_name='invitations')
     
     created_at = models.DateTimeField(auto_now_add=True)
-    expires_at = models.DateTimeField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    revision = models.PositiveIntegerField(default=0) # Bumped on every write to the invitation or its children
+    expires_at = models.DateTimeField(blank=True, null=True, db_index=True)
     slug = models.SlugField(unique=True, db_index=True, max_length=200, blank=True)
 
     # Data Mempelai
@@ -42,14 +44,34 @@ class InvitationData(models.Model):
     # JSON Fields (Untuk Array String)
     img_gallery = models.JSONField(default=list, blank=True) 
 
+    class Meta:
+        indexes = [
+            # Keyset pagination order of InvitationViewSet
+            models.Index(fields=['-created_at', '-id'], name='invitation_created_idx'),
+        ]
+
     def save(self, *args, **kwargs):
         from django.utils import timezone
         from datetime import timedelta
         # Set Default Expiration: 3 Days
         if not self.id or not self.expires_at:
              self.expires_at = timezone.now() + timedelta(days=3)
+        # Version stamp for ETags (see core/conditional.py)
+        self.revision += 1
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'revision', 'updated_at'}
         super().save(*args, **kwargs)
 
+    @classmethod
+    def touch(cls, *invitation_ids):
+        """Bump the version stamp after a write to child rows (events, members, ...)."""
+        from django.db.models import F
+        from django.utils import timezone
+        cls.objects.filter(pk__in=invitation_ids).update(
+            revision=F('revision') + 1,
+            updated_at=timezone.now()
+        )
+
     def __str__(self):
         return f"{self.groom_name} & {self.bridal_name}"
 
@@ -83,10 +105,26 @@ class InvitationMember(models.Model):
 
     class Meta:
         unique_together = ('invitation', 'user')
+        indexes = [
+            # Access index lookups: "which invitations can this user see"
+            models.Index(fields=['user', 'invitation', 'role'], name='member_user_access_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user} - {self.role} @ {self.invitation}"
 
+    @classmethod
+    def invitation_ids(cls, user, roles=None):
+        """
+        Subquery of the invitation ids `user` can access. Memberships are the
+        single access index: owners have an 'owner' row too (created with the
+        invitation, repaired by the check_access_index command).
+        """
+        memberships = cls.objects.filter(user=user)
+        if roles:
+            memberships = memberships.filter(role__in=roles)
+        return memberships.values('invitation_id')
+
 class InvitationTicket(models.Model):
     invitation = models.ForeignKey(InvitationData, on_delete=models.CASCADE, related_name='tickets')
     email = models.EmailField()
@@ -97,5 +135,33 @@ class InvitationTicket(models.Model):
     is_claimed = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Only unclaimed, unexpired tickets are looked up by token (join)
+            # and email (my-pending); the owner's list goes through the FK index
+            models.Index(
+                fields=['token_hash', 'expires_at'],
+                condition=models.Q(is_claimed=False),
+                name='ticket_unclaimed_token_idx'
+            ),
+            models.Index(
+                fields=['email', 'expires_at'],
+                condition=models.Q(is_claimed=False),
+                name='ticket_unclaimed_email_idx'
+            ),
+        ]
+
     def __str__(self):
         return f"Ticket for {self.email} ({self.role})"
+
+class PurgeCheckpoint(models.Model):
+    """
+    High-water mark of the expired-invitation reaper (purge_expired_invitations).
+    Every invitation with expires_at below the mark has already been purged.
+    """
+    name = models.CharField(max_length=100, primary_key=True)
+    high_water_mark = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} @ {self.high_water_mark}"
@@ -0,0 +1,80 @@
+"""
+Central role resolution for invitations.
+
+`get_role_resolver(request)` returns a request-scoped RoleResolver that loads
+the current user's memberships (the access index) for every invitation
+involved in one query and answers later role checks from memory.
+"""
+from django.utils import timezone
+from rest_framework import permissions
+from .models import InvitationData, InvitationMember
+
+EDIT_ROLES = ('owner', 'editor')
+
+
+class RoleResolver:
+    def __init__(self, user):
+        self.user = user
+        self._roles = {}
+
+    def _key(self, invitation_id):
+        return InvitationData._meta.pk.to_python(invitation_id)
+
+    def prime(self, invitation_ids):
+        """Load roles for all given invitations not resolved yet, in one query."""
+        missing = {self._key(invitation_id) for invitation_id in invitation_ids} - self._roles.keys()
+        if not missing:
+            return
+        roles = {}
+        if self.user.is_authenticated:
+            roles = dict(
+                InvitationMember.objects.filter(user=self.user, invitation_id__in=missing)
+                # Expired invitations grant nothing until the reaper purges them
+                .exclude(invitation__expires_at__lt=timezone.now())
+                .values_list('invitation_id', 'role')
+            )
+        for invitation_id in missing:
+            self._roles[invitation_id] = roles.get(invitation_id)
+
+    def role(self, invitation_id):
+        """The user's role on the invitation ('owner', 'editor', 'viewer') or None."""
+        key = self._key(invitation_id)
+        if key not in self._roles:
+            self.prime([key])
+        return self._roles[key]
+
+    def has_role(self, invitation_id, roles):
+        return self.role(invitation_id) in roles
+
+    def can_edit(self, invitation_id):
+        return self.has_role(invitation_id, EDIT_ROLES)
+
+    def editable(self, invitation_ids):
+        """Ids (normalized) of the given invitations the user may edit."""
+        keys = {self._key(invitation_id) for invitation_id in invitation_ids}
+        self.prime(keys)
+        return {key for key in keys if self._roles[key] in EDIT_ROLES}
+
+
+def get_role_resolver(request):
+    resolver = getattr(request, '_role_resolver', None)
+    if resolver is None or resolver.user != request.user:
+        resolver = RoleResolver(request.user)
+        request._role_resolver = resolver
+    return resolver
+
+
+class InvitationRolePermission(permissions.BasePermission):
+    """
+    Object-level check against `view.invitation_roles`, a mapping of action
+    name to the roles allowed to run it. Works for invitations and for any
+    object with an `invitation_id`. Actions not in the mapping are allowed.
+    """
+    message = 'You do not have permission to perform this action on this invitation.'
+
+    def has_object_permission(self, request, view, obj):
+        required = getattr(view, 'invitation_roles', {}).get(view.action)
+        if required is None:
+            return True
+        invitation_id = obj.pk if isinstance(obj, InvitationData) else obj.invitation_id
+        return get_role_resolver(request).has_role(invitation_id, required)
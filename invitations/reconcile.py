@@ -0,0 +1,52 @@
+"""
+Diff-based sync of nested child rows (events, digital gifts) on invitation save.
+"""
+
+
+def _differs(obj, item):
+    return [field for field, value in item.items() if getattr(obj, field) != value]
+
+
+def reconcile_children(model, existing, incoming, **parent):
+    """
+    Bring the child rows in `existing` in line with the validated `incoming`
+    items using at most one bulk_update, one bulk_create and one delete.
+
+    Items are matched to rows by `id` first. Items without a (known) id reuse a
+    leftover row holding identical values, so clients that never send ids do
+    not churn rows either. Returns True if anything was written.
+    """
+    unmatched = {obj.pk: obj for obj in existing}
+    to_update = []
+    update_fields = set()
+    pending = []
+
+    for item in incoming:
+        item = dict(item)
+        obj = unmatched.pop(item.pop('id', None), None)
+        if obj is None:
+            pending.append(item)
+            continue
+        changed = _differs(obj, item)
+        if changed:
+            for field in changed:
+                setattr(obj, field, item[field])
+            update_fields.update(changed)
+            to_update.append(obj)
+
+    to_create = []
+    for item in pending:
+        match = next((pk for pk, obj in unmatched.items() if not _differs(obj, item)), None)
+        if match is not None:
+            del unmatched[match]
+        else:
+            to_create.append(model(**parent, **item))
+
+    if to_update:
+        model.objects.bulk_update(to_update, sorted(update_fields))
+    if to_create:
+        model.objects.bulk_create(to_create)
+    if unmatched:
+        model.objects.filter(pk__in=list(unmatched)).delete()
+
+    return bool(to_update or to_create or unmatched)
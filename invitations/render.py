@@ -0,0 +1,155 @@
+"""
+Rendered-payload cache for the public (guest-facing) invitation endpoint.
+
+The invitation payload is serialized once per slug and stored as pre-encoded
+JSON bytes in the cache configured by INVITATION_RENDER_CACHE (local memory by
+default). Guest names are cached separately and spliced into the payload, so
+one invitation entry serves every guest link. Entries are dropped by the
+signals in invitations/signals.py and by the write paths that use bulk
+queries (which send no signals).
+"""
+import hashlib
+import json
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+
+def _cache():
+    return caches[settings.INVITATION_RENDER_CACHE]
+
+
+def _invitation_key(slug):
+    return f'render:inv:{slug}'
+
+
+def _invitation_alias_key(invitation_id):
+    # invitation id -> slug it was cached under, so renames and child writes
+    # (which only know the id) can find the entry
+    return f'render:inv-slug:{invitation_id}'
+
+
+def _guest_key(invitation_id, guest_slug):
+    return f'render:guest:{invitation_id}:{guest_slug}'
+
+
+def _guest_alias_key(guest_id):
+    return f'render:guest-slug:{guest_id}'
+
+
+def _etag(*parts):
+    digest = hashlib.md5(usedforsecurity=False)
+    for part in parts:
+        digest.update(part)
+    return f'"{digest.hexdigest()}"'
+
+
+def build_invitation_entry(slug):
+    from .models import InvitationData
+    from .serializers import PublicInvitationSerializer
+
+    invitation = (
+        InvitationData.objects
+        .select_related('theme', 'song')
+        .prefetch_related('events', 'digital_gifts')
+        .filter(slug=slug)
+        .first()
+    )
+    if invitation is None:
+        return None
+
+    body = JSONRenderer().render(PublicInvitationSerializer(invitation).data)
+    return {
+        'id': str(invitation.id),
+        'body': body,
+        'etag': _etag(body),
+        'last_modified': timezone.now().timestamp(),
+        'expires_at': invitation.expires_at.timestamp() if invitation.expires_at else None,
+    }
+
+
+def get_invitation_entry(slug):
+    """Cached render of an invitation, or None if missing/expired."""
+    cache = _cache()
+    key = _invitation_key(slug)
+    entry = cache.get(key)
+    if entry is None:
+        entry = build_invitation_entry(slug)
+        if entry is None:
+            return None
+        timeout = settings.INVITATION_RENDER_CACHE_TIMEOUT
+        cache.set_many({key: entry, _invitation_alias_key(entry['id']): slug}, timeout)
+
+    # Expired invitations are hidden until the reaper purges them
+    if entry['expires_at'] is not None and entry['expires_at'] < timezone.now().timestamp():
+        return None
+    return entry
+
+
+def get_guest_entry(invitation_id, guest_slug):
+    from guests.models import Guest
+
+    cache = _cache()
+    key = _guest_key(invitation_id, guest_slug)
+    entry = cache.get(key)
+    if entry is None:
+        guest = (
+            Guest.objects
+            .filter(invitation_id=invitation_id, slug=guest_slug)
+            .values('id', 'name', 'slug', 'type')
+            .first()
+        )
+        if guest is None:
+            return None
+        guest_id = str(guest.pop('id'))
+        entry = {'id': guest_id, 'data': guest}
+        timeout = settings.INVITATION_RENDER_CACHE_TIMEOUT
+        cache.set_many({key: entry, _guest_alias_key(guest_id): key}, timeout)
+    return entry
+
+
+def render_invitation(slug, guest_slug=None):
+    """
+    Return (body, etag, last_modified) for the public invitation payload,
+    optionally personalized for a guest, or None if not found.
+    """
+    entry = get_invitation_entry(slug)
+    if entry is None:
+        return None
+    body, etag = entry['body'], entry['etag']
+
+    if guest_slug is not None:
+        guest = get_guest_entry(entry['id'], guest_slug)
+        if guest is None:
+            return None
+        # Splice the guest into the pre-encoded payload instead of re-encoding it
+        guest_json = json.dumps(guest['data'], separators=(',', ':')).encode()
+        body = body[:-1] + b',"guest":' + guest_json + b'}'
+        etag = _etag(etag.encode(), guest_json)
+
+    return body, etag, entry['last_modified']
+
+
+def invalidate_invitation(invitation_id, slug=None):
+    cache = _cache()
+    alias_key = _invitation_alias_key(invitation_id)
+    keys = [alias_key]
+    cached_slug = cache.get(alias_key)
+    for value in {cached_slug, slug}:
+        if value:
+            keys.append(_invitation_key(value))
+    cache.delete_many(keys)
+
+
+def invalidate_guests(guests):
+    """Drop cached guest entries; `guests` yields (id, invitation_id, slug)."""
+    cache = _cache()
+    guests = list(guests)
+    if not guests:
+        return
+    alias_keys = [_guest_alias_key(guest_id) for guest_id, _, _ in guests]
+    keys = set(alias_keys)
+    keys.update(cache.get_many(alias_keys).values())
+    keys.update(_guest_key(invitation_id, slug) for _, invitation_id, slug in guests)
+    cache.delete_many(list(keys))
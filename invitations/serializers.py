@@ -1,8 +1,16 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Prefetch
 from .models import InvitationData, Event, BankAccount, InvitationMember, InvitationTicket
 from core.models import Template, Song
+from core.serializers import SparseFieldsetMixin
 from payments.serializers import PaymentSerializer
+from core.slugs import save_with_unique_slug
+from core.usage import record_usage
+from .reconcile import reconcile_children
+from .render import invalidate_invitation
+from .permissions import EDIT_ROLES, get_role_resolver
 
 class UserRefSerializer(serializers.ModelSerializer):
     class Meta:
@@ -30,15 +38,17 @@ class JoinInvitationSerializer(serializers.Serializer):
     token = serializers.CharField()
 
 class BankAccountSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(required=False) # Writable so updates can match existing rows
     bankName = serializers.CharField(source='bank_name')
     accountNumber = serializers.CharField(source='account_number')
     accountHolder = serializers.CharField(source='account_holder')
 
     class Meta:
         model = BankAccount
-        fields = ['bankName', 'accountNumber', 'accountHolder']
+        fields = ['id', 'bankName', 'accountNumber', 'accountHolder']
 
 class EventSerializer(serializers.ModelSerializer):
+    id = serializers.UUIDField(required=False) # Writable so updates can match existing rows
     eventName = serializers.CharField(source='event_name')
     gmapsLink = serializers.CharField(source='gmaps_link')
     timeEnd = serializers.CharField(source='time_end')
@@ -49,7 +59,17 @@ class EventSerializer(serializers.ModelSerializer):
         model = Event
         fields = ['id', 'eventName', 'address', 'gmapsLink', 'date', 'time', 'timeEnd', 'isMainEvent']
 
-class InvitationDataSerializer(serializers.ModelSerializer):
+class InvitationListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        # Resolve the user's role on every invitation of the page in one query
+        request = self.context.get('request')
+        data = list(data.all() if hasattr(data, 'all') else data)
+        if request is not None and request.user.is_authenticated:
+            get_role_resolver(request).prime([obj.pk for obj in data])
+        return super().to_representation(data)
+
+
+class InvitationDataSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     idTheme = serializers.PrimaryKeyRelatedField(source='theme', queryset=Template.objects.all(), required=False, allow_null=True)
     themeName = serializers.CharField(source='theme.name', read_only=True)
     idSong = serializers.PrimaryKeyRelatedField(source='song', queryset=Song.objects.all(), required=False, allow_null=True)
@@ -78,49 +98,68 @@ class InvitationDataSerializer(serializers.ModelSerializer):
     tickets = serializers.SerializerMethodField()
     myRole = serializers.SerializerMethodField()
 
-    def get_tickets(self, obj):
-        # Only show tickets to Owner or Editor
+    # Query plan: relation -> serializer fields that render it. The viewset
+    # feeds the relations behind the requested fields into select_related /
+    # prefetch_related so a list page costs a fixed number of queries
+    # regardless of how many invitations it holds.
+    select_related_fields = {
+        'theme': ('themeName',),
+        'song': ('song', 'idSong'),
+        'payment': ('payment',),
+    }
+    prefetch_related_fields = {
+        'events': ('eventList',),
+        'digital_gifts': ('digitalGifts',),
+        'members__user': ('members',),
+    }
+
+    @classmethod
+    def setup_eager_loading(cls, queryset, fields=None):
+        from django.utils import timezone
+
+        def wanted(plan):
+            return [
+                relation for relation, rendered_by in plan.items()
+                if fields is None or fields.intersection(rendered_by)
+            ]
+
+        queryset = queryset.select_related(*wanted(cls.select_related_fields))
+        queryset = queryset.prefetch_related(*wanted(cls.prefetch_related_fields))
+        if fields is None or 'tickets' in fields:
+            active_tickets = InvitationTicket.objects.filter(
+                is_claimed=False,
+                expires_at__gt=timezone.now()
+            )
+            queryset = queryset.prefetch_related(
+                Prefetch('tickets', queryset=active_tickets, to_attr='active_tickets')
+            )
+        return queryset
+
+    def _get_role(self, obj):
         request = self.context.get('request')
         if not request or not request.user.is_authenticated:
-            return []
-            
-        # Check permissions
-        can_see_tickets = False
-        if obj.user == request.user:
-            can_see_tickets = True
-        elif hasattr(obj, 'members'):
-            member = next((m for m in obj.members.all() if m.user == request.user), None)
-            if member and member.role in ['owner', 'editor']:
-                can_see_tickets = True
-        
-        if can_see_tickets and hasattr(obj, 'tickets'):
+            return None
+        # Owner field first (legacy rows without a membership), then the
+        # request's role resolver, primed for the whole page by the list serializer
+        if obj.user_id == request.user.id:
+            return 'owner'
+        return get_role_resolver(request).role(obj.pk)
+
+    def get_tickets(self, obj):
+        # Only show tickets to Owner or Editor
+        if self._get_role(obj) in EDIT_ROLES:
             # Return active (unclaimed, not expired) tickets
-            # Note: We might want all tickets even if expired? 
-            # User said "calon members ... members yang sedang di invite".
-            # Usually implies active.
-            from django.utils import timezone
-            valid_tickets = obj.tickets.filter(is_claimed=False, expires_at__gt=timezone.now())
+            # Prefetched by setup_eager_loading, fallback query otherwise
+            valid_tickets = getattr(obj, 'active_tickets', None)
+            if valid_tickets is None:
+                from django.utils import timezone
+                valid_tickets = obj.tickets.filter(is_claimed=False, expires_at__gt=timezone.now())
             return InvitationTicketSerializer(valid_tickets, many=True).data
             
         return []
 
     def get_myRole(self, obj):
-        request = self.context.get('request')
-        if not request or not request.user.is_authenticated:
-            return None
-        
-        # 1. Check if Owner
-        if obj.user == request.user:
-            return 'owner'
-        
-        # 2. Check if Member (Optimized with prefetch usually, but checks local cache first)
-        # We can iterate over members.all() if it's prefetched
-        if hasattr(obj, 'members'):
-            member = next((m for m in obj.members.all() if m.user == request.user), None)
-            if member:
-                return member.role
-                
-        return None
+        return self._get_role(obj)
 
     # Texts
     sentenceOpening = serializers.CharField(source='sentence_opening', required=False, allow_blank=True)
@@ -137,67 +176,88 @@ class InvitationDataSerializer(serializers.ModelSerializer):
     imgBridal = serializers.CharField(source='img_bridal', required=False, allow_blank=True)
     imgGallery = serializers.JSONField(source='img_gallery', required=False)
 
-    def _generate_unique_slug(self, name):
-        import uuid
-        from django.utils.text import slugify
-        base_slug = slugify(name)
-        if not base_slug:
-            base_slug = 'invitation'
-        
-        slug = base_slug
-        # Simple unique check loop
-        while InvitationData.objects.filter(slug=slug).exists():
-            slug = f"{base_slug}-{str(uuid.uuid4())[:8]}"
-        return slug
-
+    @transaction.atomic
     def create(self, validated_data):
         events_data = validated_data.pop('events', [])
         gifts_data = validated_data.pop('digital_gifts', [])
         
-        # Auto-generate Slug if missing or empty
+        # Create Invitation (User will be passed from perform_create in View)
+        invitation = InvitationData(**validated_data)
+
+        # Auto-generate Slug if missing or empty (insert-and-retry on the unique index)
         if not validated_data.get('slug'):
             groom = validated_data.get('groom_name', 'groom')
             bridal = validated_data.get('bridal_name', 'bridal')
-            validated_data['slug'] = self._generate_unique_slug(f"{groom}-{bridal}")
-        
-        # Create Invitation (User will be passed from perform_create in View)
-        invitation = InvitationData.objects.create(**validated_data)
+            save_with_unique_slug(invitation, f"{groom}-{bridal}", fallback='invitation')
+        else:
+            invitation.save()
+
+        # Creator becomes Owner member in the same transaction
+        InvitationMember.objects.create(
+            invitation=invitation,
+            user=invitation.user,
+            role='owner'
+        )
         
-        # Create Nested Events
-        for event in events_data:
-            Event.objects.create(invitation=invitation, **event)
-            
-        # Create Nested Gifts
-        for gift in gifts_data:
-            BankAccount.objects.create(invitation=invitation, **gift)
+        # Create Nested Events & Gifts, one INSERT per table
+        for item in events_data + gifts_data:
+            item.pop('id', None)
+        Event.objects.bulk_create([Event(invitation=invitation, **event) for event in events_data])
+        BankAccount.objects.bulk_create([BankAccount(invitation=invitation, **gift) for gift in gifts_data])
+
+        # Popularity counters (sharded, flushed into used_count later)
+        record_usage('template', invitation.theme_id)
+        record_usage('song', invitation.song_id)
             
         return invitation
 
+    @transaction.atomic
     def update(self, instance, validated_data):
-        events_data = validated_data.pop('events', [])
-        gifts_data = validated_data.pop('digital_gifts', [])
+        # None means the list was not sent (e.g. PATCH): leave those rows alone
+        events_data = validated_data.pop('events', None)
+        gifts_data = validated_data.pop('digital_gifts', None)
         
         # Update Slug if cleared? Or preserve? Usually preserve unless explicitly changed.
-        # If slug is in validated_data and empty, generate new one?
-        if 'slug' in validated_data and not validated_data['slug']:
-            groom = validated_data.get('groom_name', instance.groom_name)
-            bridal = validated_data.get('bridal_name', instance.bridal_name)
-            validated_data['slug'] = self._generate_unique_slug(f"{groom}-{bridal}")
+        # If slug is in validated_data and empty, generate new one
+        regenerate_slug = 'slug' in validated_data and not validated_data['slug']
+        if regenerate_slug:
+            del validated_data['slug']
 
-        # Update Main Fields
+        # Update Main Fields (only the columns that actually changed)
+        changed_fields = []
         for attr, value in validated_data.items():
-            setattr(instance, attr, value)
-        instance.save()
+            if getattr(instance, attr) != value:
+                setattr(instance, attr, value)
+                changed_fields.append(attr)
+        if regenerate_slug:
+            save_with_unique_slug(
+                instance,
+                f"{instance.groom_name}-{instance.bridal_name}",
+                fallback='invitation',
+                update_fields=changed_fields + ['slug']
+            )
+        elif changed_fields:
+            instance.save(update_fields=changed_fields)
+
+        # A newly picked theme/song counts as a selection
+        if 'theme' in changed_fields:
+            record_usage('template', instance.theme_id)
+        if 'song' in changed_fields:
+            record_usage('song', instance.song_id)
         
-        # Update Events (Delete all and recreate)
-        instance.events.all().delete()
-        for event in events_data:
-            Event.objects.create(invitation=instance, **event)
-            
-        # Update Gifts
-        instance.digital_gifts.all().delete()
-        for gift in gifts_data:
-            BankAccount.objects.create(invitation=instance, **gift)
+        # Update Events & Gifts: diff against existing rows, write only what changed
+        children_changed = False
+        if events_data is not None:
+            children_changed |= reconcile_children(Event, instance.events.all(), events_data, invitation=instance)
+        if gifts_data is not None:
+            children_changed |= reconcile_children(BankAccount, instance.digital_gifts.all(), gifts_data, invitation=instance)
+
+        # Bulk writes send no signals: bump the version stamp and drop the
+        # public render cache ourselves
+        if children_changed:
+            if not changed_fields and not regenerate_slug:
+                InvitationData.touch(instance.pk)
+            transaction.on_commit(lambda: invalidate_invitation(instance.pk, instance.slug))
             
         return instance
 
@@ -214,6 +274,66 @@ class InvitationDataSerializer(serializers.ModelSerializer):
             'imgCover', 'imgGroom', 'imgBridal', 'imgGallery',
             'theme', 'song', 'themeName' 
         ]
+        list_serializer_class = InvitationListSerializer
         extra_kwargs = {
             'slug': {'required': False, 'allow_blank': True} 
         }
+
+class PublicThemeSerializer(serializers.ModelSerializer):
+    idTheme = serializers.CharField(source='id_theme')
+
+    class Meta:
+        model = Template
+        fields = ['idTheme', 'name', 'category', 'path']
+
+class PublicSongSerializer(serializers.ModelSerializer):
+    idSong = serializers.CharField(source='id_song')
+
+    class Meta:
+        model = Song
+        fields = ['idSong', 'name', 'singer', 'path']
+
+class PublicInvitationSerializer(serializers.ModelSerializer):
+    """
+    Guest-facing, read-only payload of an invitation (no owner/RBAC/payment data).
+    Rendered once per slug and cached, see invitations/render.py.
+    """
+    groomName = serializers.CharField(source='groom_name')
+    groomFullname = serializers.CharField(source='groom_fullname')
+    bridalName = serializers.CharField(source='bridal_name')
+    bridalFullname = serializers.CharField(source='bridal_fullname')
+    dadGroomName = serializers.CharField(source='dad_groom_name')
+    momGroomName = serializers.CharField(source='mom_groom_name')
+    dadBridalName = serializers.CharField(source='dad_bridal_name')
+    momBridalName = serializers.CharField(source='mom_bridal_name')
+
+    eventList = EventSerializer(source='events', many=True)
+    digitalGifts = BankAccountSerializer(source='digital_gifts', many=True)
+    theme = PublicThemeSerializer()
+    song = PublicSongSerializer()
+
+    sentenceOpening = serializers.CharField(source='sentence_opening')
+    sentenceGreeting = serializers.CharField(source='sentence_greeting')
+    sentenceMiddlehook = serializers.CharField(source='sentence_middlehook')
+    sentenceClosing = serializers.CharField(source='sentence_closing')
+    sentenceLoveStory = serializers.CharField(source='sentence_love_story')
+    sentenceDigitalGift = serializers.CharField(source='sentence_digital_gift')
+    sentenceRSVP = serializers.CharField(source='sentence_rsvp')
+
+    imgCover = serializers.CharField(source='img_cover')
+    imgGroom = serializers.CharField(source='img_groom')
+    imgBridal = serializers.CharField(source='img_bridal')
+    imgGallery = serializers.JSONField(source='img_gallery')
+
+    class Meta:
+        model = InvitationData
+        fields = [
+            'id', 'slug',
+            'groomName', 'groomFullname', 'bridalName', 'bridalFullname',
+            'dadGroomName', 'momGroomName', 'dadBridalName', 'momBridalName',
+            'eventList', 'digitalGifts', 'theme', 'song',
+            'sentenceOpening', 'sentenceGreeting', 'sentenceMiddlehook', 'sentenceClosing',
+            'sentenceLoveStory', 'sentenceDigitalGift', 'sentenceRSVP',
+            'imgCover', 'imgGroom', 'imgBridal', 'imgGallery',
+        ]
+        read_only_fields = fields
@@ -0,0 +1,45 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.dispatch import receiver
+from core.models import Template, Song
+from core.signals import catalog_items_updated
+from .models import InvitationData
+from .render import invalidate_invitation
+
+# Only the parent and catalog models carry signals: child rows (events, gifts,
+# guests) are written with bulk queries and cascaded deletes, so their write
+# paths invalidate explicitly instead (and cascades stay fast deletes).
+
+@receiver(post_save, sender=InvitationData)
+@receiver(post_delete, sender=InvitationData)
+def invitation_changed(sender, instance, **kwargs):
+    # After commit, so a concurrent reader cannot re-cache the old state
+    transaction.on_commit(lambda: invalidate_invitation(instance.pk, instance.slug))
+
+
+@receiver(post_save, sender=Template)
+@receiver(pre_delete, sender=Template)
+@receiver(post_save, sender=Song)
+@receiver(pre_delete, sender=Song)
+def catalog_item_changed(sender, instance, **kwargs):
+    # pre_delete: afterwards the invitations' FK is already SET_NULL
+    field = 'theme' if sender is Template else 'song'
+    invalidate_on_commit(InvitationData.objects.filter(**{field: instance.pk}))
+
+
+@receiver(catalog_items_updated, sender=Template)
+@receiver(catalog_items_updated, sender=Song)
+def catalog_items_updated_in_bulk(sender, pks, **kwargs):
+    # Catalog loads upsert without post_save (core/catalog_sync.py)
+    field = 'theme' if sender is Template else 'song'
+    invalidate_on_commit(InvitationData.objects.filter(**{f'{field}__in': pks}))
+
+
+def invalidate_on_commit(invitations):
+    # Read now (before a delete nulls the FK), drop the cached renders after commit
+    invitations = list(invitations.values_list('id', 'slug'))
+
+    def invalidate():
+        for invitation_id, slug in invitations:
+            invalidate_invitation(invitation_id, slug)
+    transaction.on_commit(invalidate)
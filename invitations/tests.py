@@ -0,0 +1,60 @@
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from core.models import Song, Template
+from .models import BankAccount, Event, InvitationData, InvitationMember, InvitationTicket
+
+
+class InvitationListQueryCountTest(TestCase):
+    """The dashboard list runs a fixed number of queries, whatever the page holds."""
+
+    # Version stamp and the next pending ticket expiry (both for the ETag),
+    # page (theme, song and payment joined), one prefetch each for events,
+    # digital_gifts, members, their users and the active tickets, plus the
+    # caller's roles for the page
+    LIST_QUERIES = 9
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create(username='owner', email='owner@example.com')
+        cls.editor = User.objects.create(username='editor', email='editor@example.com')
+        cls.theme = Template.objects.create(id_theme='theme_test', name='Theme', category='Rustic', path='/t')
+        cls.song = Song.objects.create(id_song='song_test', name='Song', singer='Singer', category='Pop', path='/s')
+
+    def add_invitations(self, count):
+        start = InvitationData.objects.count()
+        for i in range(start, start + count):
+            invitation = InvitationData.objects.create(
+                user=self.owner, slug=f'budi-ani-{i}', theme=self.theme, song=self.song,
+                groom_name='Budi', bridal_name='Ani', dad_groom_name='Dad', mom_groom_name='Mom',
+                dad_bridal_name='Dad', mom_bridal_name='Mom'
+            )
+            InvitationMember.objects.create(invitation=invitation, user=self.owner, role='owner')
+            InvitationMember.objects.create(invitation=invitation, user=self.editor, role='editor')
+            Event.objects.create(
+                invitation=invitation, event_name='Akad', address='Jakarta', gmaps_link='https://maps.example.com',
+                date='2026-01-01', time='08:00', time_end='10:00'
+            )
+            BankAccount.objects.create(invitation=invitation, bank_name='BCA', account_number='123', account_holder='Budi')
+            InvitationTicket.objects.create(
+                invitation=invitation, email='guest@example.com', token_hash=f'hash-{i}',
+                expires_at=timezone.now() + timedelta(days=1)
+            )
+
+    def assert_list_queries(self, expected_rows):
+        client = APIClient()
+        client.force_authenticate(self.owner)
+        with self.assertNumQueries(self.LIST_QUERIES):
+            response = client.get('/api/invitations/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), expected_rows)
+        self.assertEqual(len(response.data['results'][0]['eventList']), 1)
+        self.assertEqual(len(response.data['results'][0]['tickets']), 1)
+
+    def test_list_query_count_does_not_grow_with_the_page(self):
+        self.add_invitations(2)
+        self.assert_list_queries(2)
+        self.add_invitations(5)
+        self.assert_list_queries(7)
@@ -1,10 +1,12 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import InvitationViewSet
+from .views import InvitationViewSet, PublicInvitationView
 
 router = DefaultRouter()
 router.register(r'', InvitationViewSet, basename='invitation')
 
 urlpatterns = [
+    path('public/<slug:slug>/', PublicInvitationView.as_view(), name='public-invitation'),
+    path('public/<slug:slug>/<slug:guest_slug>/', PublicInvitationView.as_view(), name='public-invitation-guest'),
     path('', include(router.urls)),
 ]
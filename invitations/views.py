@@ -1,7 +1,11 @@
-from rest_framework import viewsets, permissions, status
+from rest_framework import viewsets, views, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Q
+from django.conf import settings
+from django.db.models import Min, Sum
+from django.http import HttpResponse, JsonResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
 from datetime import timedelta
 import secrets
 import hashlib
@@ -11,54 +15,75 @@ from .serializers import (
     InvitationTicketSerializer, 
     JoinInvitationSerializer
 )
+from .render import render_invitation
+from .permissions import EDIT_ROLES, InvitationRolePermission
+from core.catalog import catalog_version
+from core.conditional import ConditionalGetMixin
+from core.pagination import KeysetPagination
 
-class InvitationViewSet(viewsets.ModelViewSet):
+class InvitationViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = InvitationDataSerializer
-    permission_classes = [permissions.IsAuthenticated]
+    permission_classes = [permissions.IsAuthenticated, InvitationRolePermission]
+    invitation_roles = {
+        # Hanya Owner atau Editor yang bisa invite
+        'invite_user': EDIT_ROLES,
+    }
+    eager_loading_actions = ('list', 'retrieve', 'update', 'partial_update')
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-created_at', '-id')
 
     def get_queryset(self):
-        # LAZY DELETION: Cek expired setiap kali user mengakses list/invitation
         from django.utils import timezone
         now = timezone.now()
-        
-        # Hapus undangan yang sudah lewat masa aktif
-        InvitationData.objects.filter(user=self.request.user, expires_at__lt=now).delete()
-        
-        # Users can only see their own invitations OR where they are members
-        return InvitationData.objects.filter(
-            Q(user=self.request.user) | Q(members__user=self.request.user)
-        ).distinct().order_by('-created_at')
+
+        # Users can only see invitations they are members of (owners included),
+        # a plain semi-join on the membership access index
+        queryset = InvitationData.objects.filter(
+            id__in=InvitationMember.invitation_ids(self.request.user)
+        ).exclude(
+            # Expired invitations are hidden here and purged in the background
+            # by the purge_expired_invitations command
+            expires_at__lt=now
+        ).order_by(*self.keyset_ordering)
+
+        # Eager-load what the serializer renders (see its query plan),
+        # limited to the requested `fields` if the client asked for a slim payload
+        if self.action in self.eager_loading_actions:
+            serializer_class = self.get_serializer_class()
+            queryset = serializer_class.setup_eager_loading(
+                queryset,
+                fields=serializer_class.requested_fields(self.request)
+            )
+        return queryset
+
+    def get_version_aggregates(self):
+        # Child writes bump revision without necessarily moving updated_at past the max
+        return {**super().get_version_aggregates(), 'revision': Sum('revision')}
+
+    def get_version_stamp(self, queryset):
+        from django.utils import timezone
+        stamp = super().get_version_stamp(queryset)
+        # themeName and song come from the catalog: renames don't touch the invitation
+        stamp['templates'] = catalog_version('templates')
+        stamp['songs'] = catalog_version('songs')
+        # Pending tickets leave `tickets` as they expire, with no write at all
+        stamp['ticket_expiry'] = InvitationTicket.objects.filter(
+            invitation__in=queryset.order_by().values('pk'),
+            is_claimed=False,
+            expires_at__gt=timezone.now()
+        ).aggregate(next=Min('expires_at'))['next']
+        return stamp
 
     def perform_create(self, serializer):
-        # Auto-assign user
-        invitation = serializer.save(user=self.request.user)
-        
-        # Juga tambahkan sebagai Member Owner agar konsisten
-        InvitationMember.objects.create(
-            invitation=invitation,
-            user=self.request.user,
-            role='owner'
-        )
+        # Auto-assign user; the serializer also adds them as Owner member
+        # in the same transaction
+        serializer.save(user=self.request.user)
 
     @action(detail=True, methods=['post'], url_path='invite')
     def invite_user(self, request, pk=None):
+        # Role check (owner/editor) done by InvitationRolePermission
         invitation = self.get_object()
         
-        # Validasi Permission: Hanya Owner atau Editor yang bisa invite
-        # Cek apakah req.user adalah owner
-        is_owner = invitation.user == request.user
-        # Cek apakah req.user adalah member dengan role owner/editor
-        is_editor = invitation.members.filter(
-            user=request.user, 
-            role__in=['owner', 'editor']
-        ).exists()
-        
-        if not (is_owner or is_editor):
-            return Response(
-                {'error': 'You do not have permission to invite users.'}, 
-                status=status.HTTP_403_FORBIDDEN
-            )
-        
         email = request.data.get('email')
         role = request.data.get('role', 'viewer')
         
@@ -83,6 +108,7 @@ class InvitationViewSet(viewsets.ModelViewSet):
             role=role,
             expires_at=expires_at
         )
+        InvitationData.touch(invitation.pk)
         
         # 4. Return Token (Plain) to User to share
         return Response({
@@ -93,6 +119,13 @@ class InvitationViewSet(viewsets.ModelViewSet):
             'note': 'Share this token manually to the user.'
         })
 
+    @action(detail=True, methods=['get'])
+    def stats(self, request, pk=None):
+        # Guest headcounts, read from the precomputed summary row
+        from guests.stats import InvitationStatsSerializer, stats_for
+        invitation = self.get_object()
+        return Response(InvitationStatsSerializer(stats_for(invitation.pk)).data)
+
     @action(detail=False, methods=['post'], url_path='join')
     def join_invitation(self, request):
         serializer = JoinInvitationSerializer(data=request.data)
@@ -129,6 +162,7 @@ class InvitationViewSet(viewsets.ModelViewSet):
         # 4. Burn Ticket
         ticket.is_claimed = True
         ticket.save()
+        InvitationData.touch(ticket.invitation_id)
         
         return Response({
             'status': 'joined', 
@@ -177,3 +211,27 @@ class InvitationViewSet(viewsets.ModelViewSet):
             })
             
         return Response(data)
+
+
+class PublicInvitationView(views.APIView):
+    """
+    Public, read-only invitation payload for guests, by invitation slug and
+    optionally a guest slug. Served from the render cache as pre-encoded JSON
+    with ETag/Last-Modified so repeat opens can be answered with 304.
+    """
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request, slug, guest_slug=None):
+        rendered = render_invitation(slug, guest_slug)
+        if rendered is None:
+            return JsonResponse({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+        body, etag, last_modified = rendered
+
+        response = get_conditional_response(request, etag=etag, last_modified=int(last_modified))
+        if response is None:
+            response = HttpResponse(body, content_type='application/json')
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        patch_cache_control(response, public=True, max_age=settings.INVITATION_RENDER_MAX_AGE)
+        return response
@@ -0,0 +1,61 @@
+"""
+User/profile upsert for Google logins.
+
+One SELECT loads the user with its profile. Returning users whose Google
+claims are unchanged cause no writes at all; otherwise only the changed
+columns are written, all inside one transaction.
+"""
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from .models import Profile
+
+
+def _create_user(email, first_name, last_name, picture_url):
+    # Savepoint so a concurrent first login for the same email can be recovered from
+    with transaction.atomic():
+        user = User(username=email, email=email, first_name=first_name, last_name=last_name)
+        user.set_unusable_password()
+        user.save()
+        user.profile = Profile.objects.create(user=user, google_picture_url=picture_url)
+    return user
+
+
+@transaction.atomic
+def upsert_google_user(id_info):
+    """Create or refresh the user (and profile) for verified Google claims."""
+    email = id_info['email']
+    first_name = id_info.get('given_name', '')
+    last_name = id_info.get('family_name', '')
+    picture_url = id_info.get('picture')
+
+    users = User.objects.select_related('profile').filter(username=email)
+    user = users.first()
+    if user is None:
+        try:
+            return _create_user(email, first_name, last_name, picture_url)
+        except IntegrityError:
+            # Lost the race against a parallel login, continue as a returning user
+            user = users.get()
+
+    # Update user info if changed
+    changed = [
+        field for field, value in (('first_name', first_name), ('last_name', last_name))
+        if getattr(user, field) != value
+    ]
+    if changed:
+        user.first_name = first_name
+        user.last_name = last_name
+        user.save(update_fields=changed)
+
+    # Handle Profile Picture
+    try:
+        profile = user.profile
+    except Profile.DoesNotExist:
+        # Users created before profiles existed (or via admin)
+        user.profile = Profile.objects.create(user=user, google_picture_url=picture_url)
+        return user
+
+    if picture_url and profile.google_picture_url != picture_url:
+        profile.google_picture_url = picture_url
+        profile.save(update_fields=['google_picture_url'])
+    return user
@@ -0,0 +1,120 @@
+"""
+Local verification of Google ID tokens.
+
+Google's signing certificates are fetched through one pooled HTTP session
+per process and kept in memory for as long as their Cache-Control max-age
+allows, so verifying a login token is a local signature check. The certs are
+only refetched when they expire or when a token is signed with a key id we
+have not seen yet (Google rotated its keys).
+"""
+import re
+import threading
+import time
+
+import requests
+from django.conf import settings
+from google.auth import jwt
+
+GOOGLE_ISSUERS = ('accounts.google.com', 'https://accounts.google.com')
+DEFAULT_MAX_AGE = 60 * 60 # When the response has no usable Cache-Control
+MIN_REFETCH_INTERVAL = 60 # Unknown key ids can't make us hammer Google
+
+_MAX_AGE_RE = re.compile(r'max-age=(\d+)')
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """One pooled requests.Session per process (keep-alive to googleapis)."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=16)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _session = session
+    return _session
+
+
+def max_age(cache_control, default=DEFAULT_MAX_AGE):
+    match = _MAX_AGE_RE.search(cache_control or '')
+    return int(match.group(1)) if match else default
+
+
+class CertCache:
+    def __init__(self, url=None):
+        self.url = url
+        self.certs = {}
+        self.expires_at = 0
+        self.fetched_at = 0
+        self.lock = threading.Lock()
+
+    def _fetch(self):
+        response = get_session().get(
+            self.url or settings.GOOGLE_CERTS_URL,
+            timeout=settings.GOOGLE_CERTS_TIMEOUT
+        )
+        response.raise_for_status()
+        now = time.monotonic()
+        self.certs = response.json()
+        self.fetched_at = now
+        self.expires_at = now + max_age(response.headers.get('Cache-Control'))
+
+    def get(self, key_id=None):
+        """
+        Current certs ({key id: PEM}). Refetches when expired, or when `key_id`
+        is unknown and the last fetch is older than MIN_REFETCH_INTERVAL.
+        """
+        now = time.monotonic()
+        if now < self.expires_at and (key_id is None or key_id in self.certs):
+            return self.certs
+        with self.lock:
+            # Another thread may have refreshed while we waited
+            now = time.monotonic()
+            stale = now >= self.expires_at
+            rotated = key_id is not None and key_id not in self.certs
+            if stale or (rotated and now - self.fetched_at >= MIN_REFETCH_INTERVAL):
+                try:
+                    self._fetch()
+                except (requests.RequestException, ValueError) as e:
+                    if not self.certs:
+                        raise ValueError(f'Could not fetch Google certificates: {e}')
+                    # Keep serving the last known certs, retry on a later request.
+                    # Counts as an attempt, so unknown key ids can't retry at once
+                    self.fetched_at = now
+                    self.expires_at = now + MIN_REFETCH_INTERVAL
+            return self.certs
+
+    def clear(self):
+        with self.lock:
+            self.certs = {}
+            self.expires_at = self.fetched_at = 0
+
+
+certs_cache = CertCache()
+
+
+def verify_google_id_token(token, audience=None):
+    """
+    Verify a Google ID token against the cached certs and return its claims.
+    Raises ValueError for invalid tokens (same contract as
+    google.oauth2.id_token.verify_oauth2_token).
+    """
+    try:
+        header = jwt.decode_header(token)
+    except Exception as e:
+        raise ValueError(f'Malformed token: {e}')
+
+    certs = certs_cache.get(header.get('kid'))
+    id_info = jwt.decode(
+        token,
+        certs=certs,
+        audience=audience or settings.GOOGLE_CLIENT_ID,
+        clock_skew_in_seconds=10
+    )
+    if id_info.get('iss') not in GOOGLE_ISSUERS:
+        raise ValueError(f"Wrong issuer: {id_info.get('iss')}")
+    return id_info
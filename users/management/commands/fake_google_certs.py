@@ -0,0 +1,112 @@
+import json
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+def generate_key_pair(common_name='fake-google-certs'):
+    """Private key PEM and a self-signed certificate PEM (what Google's v1 certs endpoint serves)."""
+    try:
+        from cryptography import x509
+        from cryptography.hazmat.primitives import hashes, serialization
+        from cryptography.hazmat.primitives.asymmetric import rsa
+        from cryptography.x509.oid import NameOID
+    except ImportError:
+        raise CommandError("The 'cryptography' package is required to generate fake certificates.")
+
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, common_name)])
+    now = datetime.now(timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - timedelta(days=1))
+        .not_valid_after(now + timedelta(days=30))
+        .sign(key, hashes.SHA256())
+    )
+    private_pem = key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption()
+    ).decode()
+    return private_pem, cert.public_bytes(serialization.Encoding.PEM).decode()
+
+
+class Command(BaseCommand):
+    help = (
+        'Serve a local stand-in for Google\'s ID token certificates. GET /certs returns '
+        'the certs with Cache-Control max-age, GET /token?email=... returns an ID token '
+        'signed with them. Run the API with GOOGLE_CERTS_URL=http://<addr>/certs.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--addr', default='127.0.0.1', help='Bind address')
+        parser.add_argument('--port', type=int, default=8765, help='Port to listen on')
+        parser.add_argument('--max-age', type=int, default=3600, help='Cache-Control max-age for /certs')
+        parser.add_argument('--audience', default=None, help='Token audience (defaults to GOOGLE_CLIENT_ID)')
+
+    def handle(self, *args, **options):
+        from google.auth import crypt, jwt
+
+        key_id = f'fake-{int(time.time())}'
+        private_pem, cert_pem = generate_key_pair()
+        signer = crypt.RSASigner.from_string(private_pem, key_id)
+        certs_body = json.dumps({key_id: cert_pem}).encode()
+        audience = options['audience'] or settings.GOOGLE_CLIENT_ID or 'fake-client-id'
+        max_age = options['max_age']
+        stdout = self.stdout
+
+        class Handler(BaseHTTPRequestHandler):
+            def _send(self, body, headers=None, status=200):
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                for header, value in (headers or {}).items():
+                    self.send_header(header, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path == '/certs':
+                    self._send(certs_body, {'Cache-Control': f'public, max-age={max_age}'})
+                elif url.path == '/token':
+                    query = parse_qs(url.query)
+                    email = query.get('email', ['fake.user@example.com'])[0]
+                    now = int(time.time())
+                    token = jwt.encode(signer, {
+                        'iss': 'https://accounts.google.com',
+                        'aud': audience,
+                        'sub': email,
+                        'email': email,
+                        'email_verified': True,
+                        'given_name': query.get('given_name', ['Fake'])[0],
+                        'family_name': query.get('family_name', ['User'])[0],
+                        'iat': now,
+                        'exp': now + 3600,
+                    })
+                    self._send(json.dumps({'id_token': token.decode()}).encode())
+                else:
+                    self._send(b'{"detail": "Not found."}', status=404)
+
+            def log_message(self, format, *args):
+                stdout.write(format % args)
+
+        server = ThreadingHTTPServer((options['addr'], options['port']), Handler)
+        host, port = server.server_address[:2]
+        self.stdout.write(self.style.SUCCESS(
+            f'Fake Google certs on http://{host}:{port}/certs (kid {key_id}, audience {audience})'
+        ))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
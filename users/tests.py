@@ -0,0 +1,156 @@
+import time
+from unittest import mock
+import requests
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from google.auth import crypt, jwt
+from .accounts import upsert_google_user
+from .google_certs import MIN_REFETCH_INTERVAL, CertCache, verify_google_id_token
+from .management.commands.fake_google_certs import generate_key_pair
+from .models import Profile
+
+CLAIMS = {
+    'email': 'budi@example.com',
+    'given_name': 'Budi',
+    'family_name': 'Santoso',
+    'picture': 'https://example.com/budi.png',
+}
+
+
+class UpsertGoogleUserTest(TestCase):
+    """Pins the statements a Google login costs."""
+
+    def upsert(self, claims):
+        with CaptureQueriesContext(connection) as queries:
+            user = upsert_google_user(claims)
+        # Savepoints only exist because TestCase wraps each test in a transaction
+        statements = [
+            query['sql'].split()[0] for query in queries.captured_queries
+            if not query['sql'].startswith(('SAVEPOINT', 'RELEASE SAVEPOINT'))
+        ]
+        return user, statements
+
+    def test_new_user(self):
+        user, statements = self.upsert(CLAIMS)
+        self.assertEqual(statements, ['SELECT', 'INSERT', 'INSERT'])
+        self.assertEqual(user.username, 'budi@example.com')
+        self.assertFalse(user.has_usable_password())
+        self.assertEqual(Profile.objects.get(user=user).google_picture_url, CLAIMS['picture'])
+
+    def test_returning_user_is_one_select(self):
+        first, _ = self.upsert(CLAIMS)
+        user, statements = self.upsert(CLAIMS)
+        self.assertEqual(statements, ['SELECT'])
+        self.assertEqual(user.pk, first.pk)
+
+    def test_changed_user_updates_only_what_changed(self):
+        self.upsert(CLAIMS)
+        user, statements = self.upsert({**CLAIMS, 'given_name': 'Budiman'})
+        self.assertEqual(statements, ['SELECT', 'UPDATE'])
+        self.assertEqual(User.objects.get(pk=user.pk).first_name, 'Budiman')
+
+        user, statements = self.upsert({**CLAIMS, 'given_name': 'Budiman', 'picture': 'https://example.com/new.png'})
+        self.assertEqual(statements, ['SELECT', 'UPDATE'])
+        self.assertEqual(Profile.objects.get(user=user).google_picture_url, 'https://example.com/new.png')
+        self.assertEqual(User.objects.count(), 1)
+
+    def test_user_without_profile_gets_one(self):
+        User.objects.create(username='budi@example.com', email='budi@example.com')
+        user, statements = self.upsert(CLAIMS)
+        self.assertEqual(statements, ['SELECT', 'UPDATE', 'INSERT'])
+        self.assertEqual(Profile.objects.get(user=user).google_picture_url, CLAIMS['picture'])
+
+
+class CertCacheTest(SimpleTestCase):
+    """Refetch policy of the Google cert cache, on a fake clock and session."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.private_pem, cls.cert_pem = generate_key_pair()
+
+    def setUp(self):
+        self.now = 1000.0
+        self.responses = []
+        self.session = mock.Mock()
+        self.session.get.side_effect = self.respond
+        patches = [
+            mock.patch('users.google_certs.time.monotonic', lambda: self.now),
+            mock.patch('users.google_certs.get_session', lambda: self.session),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.cache = CertCache('https://certs.example.com')
+
+    def respond(self, url, timeout):
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        certs, max_age = response
+        return mock.Mock(
+            json=lambda: certs,
+            headers={'Cache-Control': f'public, max-age={max_age}'},
+            raise_for_status=lambda: None,
+        )
+
+    def test_certs_are_kept_for_their_max_age(self):
+        self.responses = [({'k1': self.cert_pem}, 600), ({'k2': self.cert_pem}, 600)]
+        self.assertEqual(list(self.cache.get('k1')), ['k1'])
+        self.now += 599
+        self.assertEqual(list(self.cache.get('k1')), ['k1'])
+        self.assertEqual(self.session.get.call_count, 1)
+        self.now += 1
+        self.assertEqual(list(self.cache.get()), ['k2'])
+        self.assertEqual(self.session.get.call_count, 2)
+
+    def test_unknown_key_ids_refetch_at_most_once_per_interval(self):
+        self.responses = [({'k1': self.cert_pem}, 3600), ({'k1': self.cert_pem, 'k2': self.cert_pem}, 3600)]
+        self.cache.get('k1')
+        self.now += MIN_REFETCH_INTERVAL - 1
+        for _ in range(5):
+            self.cache.get('forged')
+        self.assertEqual(self.session.get.call_count, 1)
+        self.now += 1
+        self.assertIn('k2', self.cache.get('k2'))
+        self.assertEqual(self.session.get.call_count, 2)
+
+    def test_stale_certs_are_served_while_google_is_unreachable(self):
+        self.responses = [({'k1': self.cert_pem}, 600), requests.ConnectionError('down')]
+        self.cache.get('k1')
+        self.now += 600
+        self.assertEqual(list(self.cache.get('k1')), ['k1'])
+        self.assertEqual(self.session.get.call_count, 2)
+        # The failed fetch counts as an attempt: forged key ids don't retry it
+        for _ in range(5):
+            self.assertEqual(list(self.cache.get('forged')), ['k1'])
+        self.assertEqual(self.session.get.call_count, 2)
+
+        self.responses = [({'k2': self.cert_pem}, 600)]
+        self.now += MIN_REFETCH_INTERVAL
+        self.assertEqual(list(self.cache.get('k2')), ['k2'])
+
+    def test_first_fetch_failure_is_an_invalid_token(self):
+        self.responses = [requests.Timeout('slow')]
+        with self.assertRaises(ValueError):
+            self.cache.get('k1')
+
+    @override_settings(GOOGLE_CLIENT_ID='client-id')
+    def test_verify_token_against_cached_certs(self):
+        self.responses = [({'k1': self.cert_pem}, 3600)]
+        now = int(time.time())
+        token = jwt.encode(crypt.RSASigner.from_string(self.private_pem, 'k1'), {
+            'iss': 'https://accounts.google.com', 'aud': 'client-id', 'email': 'budi@example.com',
+            'iat': now, 'exp': now + 3600,
+        })
+        with mock.patch('users.google_certs.certs_cache', self.cache):
+            self.assertEqual(verify_google_id_token(token)['email'], 'budi@example.com')
+            forged = jwt.encode(crypt.RSASigner.from_string(generate_key_pair()[0], 'k1'), {
+                'iss': 'https://accounts.google.com', 'aud': 'client-id', 'email': 'eve@example.com',
+                'iat': now, 'exp': now + 3600,
+            })
+            with self.assertRaises(ValueError):
+                verify_google_id_token(forged)
+        self.assertEqual(self.session.get.call_count, 1)